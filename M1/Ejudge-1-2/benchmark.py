@@ -0,0 +1,67 @@
+import io
+import random
+import sys
+import time
+
+from main import CompactDeque, Deque, run_batch, run_lines
+
+
+def generate_commands(count, max_size=1000, seed=0):
+    rng = random.Random(seed)
+    commands = [f"set_size {max_size}"]
+    for _ in range(count - 1):
+        r = rng.random()
+        if r < 0.3:
+            commands.append(f"pushf {rng.randint(0, 10 ** 6)}")
+        elif r < 0.6:
+            commands.append(f"pushb {rng.randint(0, 10 ** 6)}")
+        elif r < 0.75:
+            commands.append("popf")
+        elif r < 0.9:
+            commands.append("popb")
+        elif r < 0.9001:
+            commands.append("print")
+        else:
+            commands.append(rng.choice(["pushf a b", "popf x", "unknown", "set_size 5"]))
+    return "\n".join(commands) + "\n"
+
+
+def replay_lines(data, deque_class):
+    stdin, stdout = sys.stdin, sys.stdout
+    sys.stdin, sys.stdout = io.StringIO(data), io.StringIO()
+    try:
+        run_lines(deque_class)
+        return sys.stdout.getvalue()
+    finally:
+        sys.stdin, sys.stdout = stdin, stdout
+
+
+def replay_batch(data, deque_class):
+    output = io.StringIO()
+    run_batch(deque_class, io.StringIO(data), output)
+    return output.getvalue()
+
+
+def measure(name, func, data, count, deque_class):
+    start = time.perf_counter()
+    result = func(data, deque_class)
+    elapsed = time.perf_counter() - start
+    print(f"{name:>16}: {count / elapsed:12,.0f} commands/s ({elapsed:.2f} s)")
+    return result
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000
+    data = generate_commands(count)
+
+    for deque_class in (Deque, CompactDeque):
+        print(deque_class.__name__)
+        expected = measure("lines", replay_lines, data, count, deque_class)
+        result = measure("batch", replay_batch, data, count, deque_class)
+        if result != expected:
+            print("outputs differ!")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,38 @@
+import io
 import re
+import sys
+from array import array
+from itertools import accumulate
+
+
+class DequeError(Exception):
+    # То, что печатает CLI, когда операция не удалась
+    output = "error"
+
+
+class DequeOverflowError(DequeError):
+    output = "overflow"
+
+
+class DequeUnderflowError(DequeError):
+    output = "underflow"
+
+
+def ring_assign(ring, start, values):
+    # Запись в подряд идущие ячейки кольца, не больше двух присваиваний срезов
+    split = len(ring) - start
+    if len(values) <= split:
+        ring[start:start + len(values)] = values
+    else:
+        ring[start:] = values[:split]
+        ring[:len(values) - split] = values[split:]
+
+
+def ring_slice(ring, start, count):
+    end = start + count
+    if end <= len(ring):
+        return ring[start:end]
+    return ring[start:] + ring[:end - len(ring)]
 
 
 class Deque:
@@ -12,7 +46,7 @@ class Deque:
                 self.max_size = max_size
                 self.deque = [None] * max_size
             else:
-                print("error")
+                raise DequeError("Deque size must be non-negative")
 
     def pushf(self, value):
         if self.size < self.max_size:
@@ -20,7 +54,7 @@ class Deque:
             self.deque[self.front] = value
             self.size += 1
         else:
-            print("overflow")
+            raise DequeOverflowError("Deque is full")
 
     def pushb(self, value):
         if self.size < self.max_size:
@@ -28,76 +62,388 @@ class Deque:
             self.rear = (self.rear + 1) % self.max_size
             self.size += 1
         else:
-            print("overflow")
+            raise DequeOverflowError("Deque is full")
 
     def popf(self):
         if self.size > 0:
             value = self.deque[self.front]
+            self.deque[self.front] = None
             self.front = (self.front + 1) % self.max_size
             self.size -= 1
             return value
         else:
-            return "underflow"
+            raise DequeUnderflowError("Deque is empty")
 
     def popb(self):
         if self.size > 0:
             self.rear = (self.rear - 1) % self.max_size
             value = self.deque[self.rear]
+            self.deque[self.rear] = None
             self.size -= 1
             return value
         else:
-            return "underflow"
+            raise DequeUnderflowError("Deque is empty")
+
+    def extend_front(self, values):
+        # То же, что pushf для каждого значения по порядку: последнее окажется в начале
+        values = list(values)
+        if len(values) > self.max_size - self.size:
+            raise DequeOverflowError("Not enough free space in deque")
+        if values:
+            values.reverse()
+            self.front = (self.front - len(values)) % self.max_size
+            ring_assign(self.deque, self.front, values)
+            self.size += len(values)
+
+    def extend_back(self, values):
+        values = list(values)
+        if len(values) > self.max_size - self.size:
+            raise DequeOverflowError("Not enough free space in deque")
+        if values:
+            ring_assign(self.deque, self.rear, values)
+            self.rear = (self.rear + len(values)) % self.max_size
+            self.size += len(values)
 
-    def print_deque(self):
+    def pop_many(self, count, back=False):
+        # Значения в том порядке, в котором их вернули бы count вызовов popf (или popb)
+        if count > self.size:
+            raise DequeUnderflowError("Not enough elements in deque")
+        if count <= 0:
+            return []
+
+        if back:
+            self.rear = (self.rear - count) % self.max_size
+            start = self.rear
+        else:
+            start = self.front
+            self.front = (self.front + count) % self.max_size
+        self.size -= count
+
+        values = ring_slice(self.deque, start, count)
+        ring_assign(self.deque, start, [None] * count)
+        if back:
+            values.reverse()
+        return values
+
+    def print_deque(self, output_stream=None):
+        if output_stream is None:
+            output_stream = sys.stdout
         if self.size == 0:
-            print("empty")
+            output_stream.write("empty\n")
+            return
+
+        # Занятая часть кольца - это один срез или два, если она переходит через конец списка
+        end = self.front + self.size
+        if end <= self.max_size:
+            line = " ".join(self.deque[self.front:end])
         else:
-            for i in range(self.size - 1):
-                index = (self.front + i) % self.max_size
-                print(self.deque[index], end=" ")
-            print(self.deque[(self.front + self.size - 1) % self.max_size])
+            line = " ".join(self.deque[self.front:]) + " " + " ".join(self.deque[:end - self.max_size])
+        output_stream.write(line + "\n")
 
 
-max_size = 0
-deque = Deque()
+class CompactDeque:
+    # Элементы лежат в одном bytearray (UTF-8, после каждого пробел), в кольце хранятся только
+    # смещение и длина. На элемент уходит 12 байт (q + i) плюс байты строки с пробелом, а не указатель
+    # на отдельный str (~57 байт + длина на 64-битном CPython). Место после pop освобождается при уплотнении.
+    __slots__ = ('max_size', 'front', 'rear', 'size', 'arena', 'offsets', 'lengths', 'used', 'ordered')
 
-while True:
-    try:
-        command = input()
-        if not command:
-            continue
-
-        if deque.max_size is None:
-            if re.match(r'^set_size [-+]?\d+$', command):
-                max_size = int(command[9:])
-                deque = Deque(max_size)
+    ENCODING = 'utf-8'
+    ERRORS = 'surrogatepass'
+    MIN_COMPACT_SIZE = 1 << 16
+
+    def __init__(self, max_size=None):
+        self.max_size = None
+        self.front = 0
+        self.rear = 0
+        self.size = 0
+        self.arena = bytearray()
+        self.offsets = array('q')
+        self.lengths = array('i')
+        self.used = 0
+        # Элементы в arena идут в порядке дека, начиная со смещения первого, без дыр
+        self.ordered = True
+        if max_size is not None:
+            if max_size >= 0:
+                self.max_size = max_size
+                self.offsets = array('q', bytes(8 * max_size))
+                self.lengths = array('i', bytes(4 * max_size))
             else:
-                print("error")
-            continue
+                raise DequeError("Deque size must be non-negative")
+
+    def __store(self, index, value):
+        data = value.encode(self.ENCODING, self.ERRORS)
+        self.offsets[index] = len(self.arena)
+        self.lengths[index] = len(data)
+        self.arena += data
+        self.arena += b" "
+        self.used += len(data) + 1
+
+    def __store_many(self, values):
+        # Дописывает значения в arena одним куском, возвращает их смещения и длины
+        data = [value.encode(self.ENCODING, self.ERRORS) for value in values]
+        lengths = array('i', map(len, data))
+        offsets = array('q', accumulate(map((1).__add__, lengths), initial=len(self.arena)))
+        offsets.pop()
+        self.arena += b" ".join(data)
+        self.arena += b" "
+        self.used += sum(lengths) + len(data)
+        return offsets, lengths
+
+    def __load(self, index):
+        offset = self.offsets[index]
+        length = self.lengths[index]
+        value = self.arena[offset:offset + length].decode(self.ENCODING, self.ERRORS)
+        self.used -= length + 1
+        self.__reclaim(offset if offset + length + 1 == len(self.arena) else None)
+        return value
 
-        if re.match(r'^pushf \S*$', command):
-            value = command[6:]
-            deque.pushf(value)
+    def __reclaim(self, tail=None):
+        # tail - смещение, начиная с которого конец arena занят только снятыми элементами
+        if self.size == 0:
+            self.arena.clear()
+            self.ordered = True
+        elif tail is not None:
+            del self.arena[tail:]
+        elif len(self.arena) > self.MIN_COMPACT_SIZE and len(self.arena) > 2 * self.used:
+            self.__compact()
+
+    def __compact(self):
+        # Переписываем живые элементы в новый буфер по порядку дека, мусор от pop пропадает
+        arena = bytearray()
+        for i in range(self.size):
+            index = (self.front + i) % self.max_size
+            offset = self.offsets[index]
+            self.offsets[index] = len(arena)
+            arena += self.arena[offset:offset + self.lengths[index] + 1]
+        self.arena = arena
+        self.ordered = True
+
+    def pushf(self, value):
+        if self.size < self.max_size:
+            self.front = (self.front - 1) % self.max_size
+            self.__store(self.front, value)
+            self.ordered = self.size == 0
+            self.size += 1
+        else:
+            raise DequeOverflowError("Deque is full")
+
+    def pushb(self, value):
+        if self.size < self.max_size:
+            self.__store(self.rear, value)
+            self.rear = (self.rear + 1) % self.max_size
+            self.size += 1
+        else:
+            raise DequeOverflowError("Deque is full")
+
+    def popf(self):
+        if self.size > 0:
+            index = self.front
+            self.front = (self.front + 1) % self.max_size
+            self.size -= 1
+            return self.__load(index)
+        else:
+            raise DequeUnderflowError("Deque is empty")
 
-        elif re.match(r'^pushb \S*$', command):
-            value = command[6:]
-            deque.pushb(value)
+    def popb(self):
+        if self.size > 0:
+            self.rear = (self.rear - 1) % self.max_size
+            self.size -= 1
+            return self.__load(self.rear)
+        else:
+            raise DequeUnderflowError("Deque is empty")
 
-        elif command == "popf":
-            result = deque.popf()
-            print(result)
+    def extend_front(self, values):
+        values = list(values)
+        if len(values) > self.max_size - self.size:
+            raise DequeOverflowError("Not enough free space in deque")
+        if values:
+            offsets, lengths = self.__store_many(values)
+            offsets.reverse()
+            lengths.reverse()
+            self.front = (self.front - len(values)) % self.max_size
+            ring_assign(self.offsets, self.front, offsets)
+            ring_assign(self.lengths, self.front, lengths)
+            self.ordered = self.size == 0 and len(values) == 1
+            self.size += len(values)
 
-        elif command == "popb":
-            result = deque.popb()
-            print(result)
+    def extend_back(self, values):
+        values = list(values)
+        if len(values) > self.max_size - self.size:
+            raise DequeOverflowError("Not enough free space in deque")
+        if values:
+            offsets, lengths = self.__store_many(values)
+            ring_assign(self.offsets, self.rear, offsets)
+            ring_assign(self.lengths, self.rear, lengths)
+            self.rear = (self.rear + len(values)) % self.max_size
+            self.size += len(values)
 
-        elif command == "print":
-            result = deque.print_deque()
+    def pop_many(self, count, back=False):
+        if count > self.size:
+            raise DequeUnderflowError("Not enough elements in deque")
+        if count <= 0:
+            return []
 
+        if back:
+            self.rear = (self.rear - count) % self.max_size
+            start = self.rear
         else:
-            print("error")
+            start = self.front
+            self.front = (self.front + count) % self.max_size
+        self.size -= count
+
+        offsets = ring_slice(self.offsets, start, count)
+        lengths = ring_slice(self.lengths, start, count)
+        values = [self.arena[offset:offset + length].decode(self.ENCODING, self.ERRORS)
+                  for offset, length in zip(offsets, lengths)]
+        self.used -= sum(lengths) + count
+        # Если arena упорядочена, снятые с конца элементы занимают её хвост
+        self.__reclaim(offsets[0] if back and self.ordered else None)
+        if back:
+            values.reverse()
+        return values
+
+    def print_deque(self, output_stream=None):
+        if output_stream is None:
+            output_stream = sys.stdout
+        if self.size == 0:
+            output_stream.write("empty\n")
+            return
+
+        if not self.ordered:
+            self.__compact()
+        # Элементы уже разделены пробелами, вместо последнего пробела ставим перевод строки
+        line = self.arena[self.offsets[self.front]:-1]
+        output_stream.write(line.decode(self.ENCODING, self.ERRORS) + "\n")
+
+
+def run_lines(deque_class=Deque):
+    deque = deque_class()
+
+    while True:
+        try:
+            command = input()
+            if not command:
+                continue
+
+            if deque.max_size is None:
+                if re.match(r'^set_size [-+]?\d+$', command):
+                    max_size = int(command[9:])
+                    deque = deque_class(max_size)
+                else:
+                    print("error")
+                continue
+
+            if re.match(r'^pushf \S*$', command):
+                value = command[6:]
+                deque.pushf(value)
+
+            elif re.match(r'^pushb \S*$', command):
+                value = command[6:]
+                deque.pushb(value)
+
+            elif command == "popf":
+                result = deque.popf()
+                print(result)
+
+            elif command == "popb":
+                result = deque.popb()
+                print(result)
+
+            elif command == "print":
+                deque.print_deque()
+
+            else:
+                print("error")
+
+        except DequeError as ex:
+            print(ex.output)
+        except EOFError:
+            break
+        except KeyboardInterrupt:
+            break
+
+
+def is_size(argument):
+    # То же, что [-+]?\d+ : isdecimal() пропускает те же юникодные цифры, что и \d
+    digits = argument[1:] if argument[:1] in ('-', '+') else argument
+    return digits.isdecimal()
+
+
+def is_value(argument):
+    # То же, что \S* : split() режет по тем же пробельным символам, что и \s
+    return not argument or argument.split() == [argument]
+
+
+def batch_pushf(deque, value, output):
+    deque.pushf(value)
+
+
+def batch_pushb(deque, value, output):
+    deque.pushb(value)
+
+
+def batch_popf(deque, value, output):
+    output.write(deque.popf() + "\n")
+
+
+def batch_popb(deque, value, output):
+    output.write(deque.popb() + "\n")
+
+
+def batch_print(deque, value, output):
+    deque.print_deque(output_stream=output)
+
+
+# Команда -> (обработчик, есть ли у команды значение)
+BATCH_COMMANDS = {
+    "pushf": (batch_pushf, True),
+    "pushb": (batch_pushb, True),
+    "popf": (batch_popf, False),
+    "popb": (batch_popb, False),
+    "print": (batch_print, False),
+}
+
+
+def run_batch(deque_class=Deque, input_stream=None, output_stream=None):
+    input_stream = input_stream or sys.stdin
+    output_stream = output_stream or sys.stdout
+    output = io.StringIO()
+    deque = None
+
+    try:
+        for command in input_stream.read().split("\n"):
+            if not command:
+                continue
+
+            name, separator, argument = command.partition(" ")
+
+            try:
+                if deque is None:
+                    if name == "set_size" and separator and is_size(argument):
+                        deque = deque_class(int(argument))
+                    else:
+                        output.write("error\n")
+                    continue
+
+                handler, takes_value = BATCH_COMMANDS.get(name, (None, False))
+                if handler is None or bool(separator) != takes_value or takes_value and not is_value(argument):
+                    output.write("error\n")
+                    continue
+                handler(deque, argument, output)
+            except DequeError as ex:
+                output.write(ex.output + "\n")
+    finally:
+        # Старый цикл падает на размере длиннее 4300 цифр, успев напечатать всё до него, - так же и здесь
+        output_stream.write(output.getvalue())
+
+
+def main():
+    deque_class = CompactDeque if '--compact' in sys.argv[1:] else Deque
+    if '--batch' in sys.argv[1:]:
+        run_batch(deque_class)
+    else:
+        run_lines(deque_class)
+
 
-    except EOFError:
-        break
-    except KeyboardInterrupt:
-        break
+if __name__ == '__main__':
+    main()
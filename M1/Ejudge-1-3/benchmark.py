@@ -0,0 +1,157 @@
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+
+from main import Graph, PathWriter, ReachabilityIndex
+
+
+def generate_graph(edge_count, seed=0):
+    # Лес из цепочек зависимостей (корни деревьев - прямые зависимости) и столько же случайных
+    # рёбер в отдельной части графа, из которой прямые зависимости недостижимы
+    rng = random.Random(seed)
+    tree_size = edge_count // 2
+    lines = []
+    for library in range(1, tree_size + 1):
+        lines.append(f"p{rng.randrange(library)} p{library}")
+    for _ in range(edge_count - tree_size):
+        lines.append(f"n{rng.randrange(tree_size)} n{rng.randrange(tree_size)}")
+    vulnerable = [f"p{rng.randrange(tree_size)}" for _ in range(1000)]
+    direct = ["p0"]
+    return vulnerable, direct, lines
+
+
+def generate_ladders(root_count, depth):
+    # Для каждой уязвимой библиотеки своя "лестница" ширины 2: 2 ** depth путей до общей вершины top
+    vulnerable, lines = [], []
+    for root in range(root_count):
+        vulnerable.append(f"r{root}_0_0")
+        lines.append(f"top r{root}_{depth - 1}_0 r{root}_{depth - 1}_1")
+        for layer in range(1, depth):
+            for column in range(2):
+                lines.append(f"r{root}_{layer}_{column} r{root}_{layer - 1}_0 r{root}_{layer - 1}_1")
+    return vulnerable, ["top"], lines
+
+
+def generate_chain(depth):
+    # Одна цепочка: уязвимая библиотека c0 в самом низу, прямая зависимость на высоте depth
+    lines = [f"c{library + 1} c{library}" for library in range(depth)]
+    return ["c0"], [f"c{depth}"], lines
+
+
+def generate_fan_in(vertex_count, edge_count, root_count, seed=0):
+    # Цепочка p0 <- p1 <- ... плюс случайные рёбра вниз по номерам: почти каждая вершина доходит до p0
+    # через p1..p4, так что удаление ребра p4 -> p3 задевает почти все корни
+    rng = random.Random(seed)
+    lines = [f"p{library - 1} p{library}" for library in range(1, vertex_count)]
+    for _ in range(edge_count - vertex_count + 1):
+        library = rng.randrange(1, vertex_count)
+        lines.append(f"p{rng.randrange(library)} p{library}")
+    vulnerable = [f"p{rng.randrange(vertex_count // 2, vertex_count)}" for _ in range(root_count)]
+    return vulnerable, ["p0"], lines
+
+
+def compare_index(vertex_count, edge_count, root_count):
+    print(f"index: {vertex_count:,} vertices, {edge_count:,} edges, {root_count} vulnerable libraries")
+    graph = load(*generate_fan_in(vertex_count, edge_count, root_count))
+    index = measure("build", ReachabilityIndex, graph)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'index')
+        measure("save", index.save, path)
+        index = measure("load", ReachabilityIndex.load, path)
+    measure("remove", index.apply, [(False, 'p3', ['p4'])])
+    measure("add", index.apply, [(True, 'p3', ['p4'])])
+
+
+def load(vulnerable, direct, lines):
+    graph = Graph()
+    for library in vulnerable:
+        graph.add_vulnerable_library(library)
+    for library in direct:
+        graph.add_direct_dependency(library)
+    for line in lines:
+        data = line.split()
+        graph.add_dependency(data[0], data[1:])
+    return graph
+
+
+def measure(name, func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    print(f"{name:>10}: {time.perf_counter() - start:.3f} s")
+    return result
+
+
+def adjacency_size(graph):
+    adjacency = (graph.dependencies, graph.requirements)
+    return sum(sys.getsizeof(table) + sum(map(sys.getsizeof, table.values())) for table in adjacency)
+
+
+def csr_size(graph):
+    arrays = (graph.offsets, graph.targets, graph.reverse_offsets, graph.reverse_targets)
+    return sum(map(sys.getsizeof, arrays))
+
+
+def main():
+    edge_count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    vulnerable, direct, lines = generate_graph(edge_count)
+
+    graph = measure("load", load, vulnerable, direct, lines)
+    sets_size = adjacency_size(graph)
+    measure("freeze", graph.freeze)
+    print(f"sets: {sets_size / edge_count:.1f} bytes/edge, csr: {csr_size(graph) / edge_count:.1f} bytes/edge")
+
+    output = io.StringIO()
+    with redirect_stdout(output):
+        measure("find", graph.find_paths)
+    print(f"paths: {output.getvalue().count(chr(10))}")
+
+    print("parallel search:")
+    graph = load(*generate_ladders(64, 13))
+    graph.freeze()
+    expected = io.StringIO()
+    start = time.perf_counter()
+    graph.find_paths(PathWriter(expected))
+    base = time.perf_counter() - start
+    print(f"{'sequential':>10}: {base:.3f} s")
+
+    workers = 1
+    while workers <= (os.cpu_count() or 1):
+        output = io.StringIO()
+        start = time.perf_counter()
+        graph.find_paths_parallel(PathWriter(output), workers)
+        elapsed = time.perf_counter() - start
+        print(f"{f'x{workers}':>10}: {elapsed:.3f} s, speedup {base / elapsed:.2f}x")
+        if output.getvalue() != expected.getvalue():
+            print("outputs differ!")
+            sys.exit(1)
+        workers *= 2
+
+    # Путь глубины d должен стоить O(d) памяти, а не O(d^2)
+    print("deep chain:")
+    for depth in (10_000, 100_000):
+        graph = load(*generate_chain(depth))
+        graph.freeze()
+        output = io.StringIO()
+        tracemalloc.start()
+        start = time.perf_counter()
+        graph.find_paths(PathWriter(output))
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        line_size = len(output.getvalue())
+        print(f"{depth:>10,}: {elapsed:.3f} s, line {line_size / 2 ** 20:.2f} MiB, "
+              f"peak memory {peak / 2 ** 20:.2f} MiB")
+        if peak > 64 * line_size + (1 << 20):
+            print("peak memory is not linear in the path length!")
+            sys.exit(1)
+
+    compare_index(100_000, 1_000_000, 200)
+
+
+if __name__ == '__main__':
+    main()
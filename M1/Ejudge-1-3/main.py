@@ -1,20 +1,51 @@
+import argparse
+import io
+import multiprocessing
+import os
+import pickle
+import sys
+from array import array
 from collections import deque
 
 
 class Graph:
+    # Имена библиотек при вводе заменяются на плотные номера, а после ввода рёбра замораживаются
+    # в CSR: offsets[v]..offsets[v + 1] - это срез targets с соседями v. Одно ребро хранится в обе
+    # стороны, это 2 * 4 = 8 байт, плюс 8 байт offsets на вершину. Словари множеств на разреженном
+    # графе тратят больше 300 байт на ребро (benchmark.py: ~370 против ~16 на миллионе рёбер).
     def __init__(self):
+        self.names = []
+        self.ids = {}
         self.dependencies = {}
-        self.vulnerable_libraries = set()
+        self.requirements = {}
+        self.vulnerable_libraries = []
         self.direct_dependencies = set()
+        self.frozen = False
+        self.offsets = array('i')
+        self.targets = array('i')
+        self.reverse_offsets = array('i')
+        self.reverse_targets = array('i')
+
+    def intern(self, library):
+        library_id = self.ids.get(library)
+        if library_id is None:
+            library_id = self.ids[library] = len(self.names)
+            self.names.append(library)
+        return library_id
 
     def add_dependency(self, dependency, libraries):
-        for library in set(libraries):
+        dependency = self.intern(dependency)
+        for library in set(map(self.intern, libraries)):
             if library == dependency:
                 continue
             if library in self.dependencies:
                 self.dependencies[library].add(dependency)
             else:
                 self.dependencies[library] = {dependency}
+            if dependency in self.requirements:
+                self.requirements[dependency].add(library)
+            else:
+                self.requirements[dependency] = {library}
 
         # if dependency in self.dependencies:
         #     self.dependencies[dependency].update(set(libraries))
@@ -23,38 +54,206 @@ class Graph:
         # self.dependencies[dependency].discard(dependency)
 
     def add_vulnerable_library(self, library):
-        self.vulnerable_libraries.add(library)
+        self.vulnerable_libraries.append(self.intern(library))
 
     def add_direct_dependency(self, library):
-        self.direct_dependencies.add(library)
+        self.direct_dependencies.add(self.intern(library))
+
+    @staticmethod
+    def build_csr(adjacency, vertex_count):
+        offsets = array('i', bytes(4 * (vertex_count + 1)))
+        targets = array('i')
+        for vertex in range(vertex_count):
+            neighbours = adjacency.get(vertex)
+            if neighbours:
+                targets.extend(neighbours)
+            offsets[vertex + 1] = len(targets)
+        return offsets, targets
 
-    def find_paths_from_vertex(self, vertex):
-        stack = deque()
-        visited = set()
-        path = []
+    def freeze(self):
+        # После ввода множества больше не нужны, дальше все обходы идут по массивам
+        vertex_count = len(self.names)
+        self.offsets, self.targets = self.build_csr(self.dependencies, vertex_count)
+        self.reverse_offsets, self.reverse_targets = self.build_csr(self.requirements, vertex_count)
+        self.dependencies = {}
+        self.requirements = {}
+        self.frozen = True
 
-        stack.append((vertex, iter(self.dependencies.get(vertex, set()))))
+    def find_reaching_vertices(self):
+        # Обратный BFS от прямых зависимостей: вершины, из которых до них вообще можно дойти
+        offsets, targets = self.reverse_offsets, self.reverse_targets
+        reaching = bytearray(len(self.names))
+        queue = deque(self.direct_dependencies)
+        for vertex in queue:
+            reaching[vertex] = 1
+        while queue:
+            vertex = queue.popleft()
+            for library in targets[offsets[vertex]:offsets[vertex + 1]]:
+                if not reaching[library]:
+                    reaching[library] = 1
+                    queue.append(library)
+        return reaching
 
-        while stack:
-            current_vertex, children = stack[-1]
+    def find_paths_from_vertex(self, vertex, reaching, writer):
+        # Простые пути от уязвимой библиотеки до прямых зависимостей. Заходим только в вершины,
+        # из которых прямая зависимость достижима, так что тупиковые ветки не обходятся.
+        # Если writer заполнился раньше, чем закончился обход, возвращает (path, positions) для continue_paths
+        if not reaching[vertex] or writer.full:
+            return None
+        if vertex in self.direct_dependencies:
+            writer.write(self.names[vertex])
+        return self.continue_paths([vertex], [self.offsets[vertex]], reaching, writer)
 
-            try:
-                child = next(children)
+    def continue_paths(self, path, positions, reaching, writer):
+        # Обход с места, где он остановился. positions[i] - следующий необработанный ребёнок path[i]
+        # в targets. Состояние занимает O(глубины), так что длинный обход можно резать на порции
+        offsets, targets = self.offsets, self.targets
+        names = self.names
+        direct = self.direct_dependencies
+        on_path = bytearray(len(names))
+        for library in path:
+            on_path[library] = 1
 
-                for child in self.dependencies.get(current_vertex, set()):
-                    if child not in visited:
-                        path.append(child)
-                        visited.add(child)
+        while positions and not writer.full:
+            position = positions[-1]
+            end = offsets[path[-1] + 1]
+            while position < end:
+                child = targets[position]
+                position += 1
+                if reaching[child] and not on_path[child]:
+                    break
+            else:
+                # Все дети текущей вершины обойдены
+                positions.pop()
+                on_path[path.pop()] = 0
+                continue
+
+            positions[-1] = position
+            path.append(child)
+            on_path[child] = 1
+            if child in direct:
+                # Строка собирается заново за время, линейное по её длине: кэш префиксов стоил
+                # O(d^2) памяти на первом пути глубины d
+                writer.write(' '.join([names[library] for library in reversed(path)]))
+            positions.append(offsets[child])
+
+        return (path, positions) if positions else None
+
+    def count_acyclic_paths(self, reaching):
+        # Tarjan по вершинам из reaching. Компоненты выходят в обратном топологическом порядке,
+        # так что для вершины вне циклов все дети уже посчитаны. acyclic[v] - ниже v нет циклов,
+        # тогда число простых путей из v в прямые зависимости не зависит от пути до v: counts[v]
+        offsets, targets = self.offsets, self.targets
+        direct = self.direct_dependencies
+        vertex_count = len(self.names)
+        index = array('i', [-1]) * vertex_count
+        low = array('i', [0]) * vertex_count
+        on_stack = bytearray(vertex_count)
+        acyclic = bytearray(vertex_count)
+        counts = {}
+        component_stack = []
+        counter = 0
+
+        for root in range(vertex_count):
+            if not reaching[root] or index[root] != -1:
+                continue
 
-                        if child in self.direct_dependencies:
-                            print(' '.join(reversed(path)))
+            index[root] = low[root] = counter
+            counter += 1
+            component_stack.append(root)
+            on_stack[root] = 1
+            work = [(root, offsets[root])]
+
+            while work:
+                vertex, position = work[-1]
+                end = offsets[vertex + 1]
+                while position < end:
+                    child = targets[position]
+                    position += 1
+                    if not reaching[child]:
+                        continue
+                    if index[child] == -1:
+                        break
+                    if on_stack[child] and index[child] < low[vertex]:
+                        low[vertex] = index[child]
+                else:
+                    work.pop()
+                    if work and low[vertex] < low[work[-1][0]]:
+                        low[work[-1][0]] = low[vertex]
+                    if low[vertex] != index[vertex]:
+                        continue
+
+                    component = component_stack.pop()
+                    on_stack[component] = 0
+                    if component != vertex:
+                        # Нетривиальная компонента: циклы, пути через неё придётся перебирать
+                        while component != vertex:
+                            component = component_stack.pop()
+                            on_stack[component] = 0
+                        continue
+
+                    count = 1 if vertex in direct else 0
+                    for child in targets[offsets[vertex]:end]:
+                        if not reaching[child]:
+                            continue
+                        if not acyclic[child]:
+                            break
+                        count += counts[child]
+                    else:
+                        acyclic[vertex] = 1
+                        counts[vertex] = count
+                    continue
+
+                work[-1] = (vertex, position)
+                index[child] = low[child] = counter
+                counter += 1
+                component_stack.append(child)
+                on_stack[child] = 1
+                work.append((child, offsets[child]))
+
+        return acyclic, counts
+
+    def count_paths_from_vertex(self, vertex, reaching, acyclic, counts):
+        # Перебор как в find_paths_from_vertex, но в вершины без циклов ниже не спускаемся,
+        # а сразу берём их посчитанное число путей
+        if not reaching[vertex]:
+            return 0
+        if acyclic[vertex]:
+            return counts[vertex]
+
+        offsets, targets = self.offsets, self.targets
+        direct = self.direct_dependencies
+        total = 1 if vertex in direct else 0
+        path = [vertex]
+        on_path = bytearray(len(self.names))
+        on_path[vertex] = 1
+
+        positions = [offsets[vertex]]
+        while positions:
+            position = positions[-1]
+            end = offsets[path[-1] + 1]
+            while position < end:
+                child = targets[position]
+                position += 1
+                if not reaching[child]:
+                    continue
+                if acyclic[child]:
+                    total += counts[child]
+                elif not on_path[child]:
+                    break
+            else:
+                positions.pop()
+                on_path[path.pop()] = 0
+                continue
 
-                        stack.append((child, iter(self.dependencies.get(child, set()))))
-            except StopIteration:
-                # All children of current_vertex have been visited
-                stack.pop()
-                path.pop()
-                visited.remove(current_vertex)
+            positions[-1] = position
+            path.append(child)
+            on_path[child] = 1
+            if child in direct:
+                total += 1
+            positions.append(offsets[child])
+
+        return total
 
     # def find_paths_from_vertex(self, vertex, path, visited):
     #     path.append(vertex)
@@ -76,18 +275,382 @@ class Graph:
     #     path.pop()
     #     visited.remove(vertex)
 
-    def find_paths(self):
+    def find_paths(self, writer=None):
+        if not self.frozen:
+            self.freeze()
+        if writer is None:
+            writer = PathWriter(sys.stdout)
         if self.direct_dependencies:
-            for library in self.vulnerable_libraries:
-                self.find_paths_from_vertex(library)
+            reaching = self.find_reaching_vertices()
+            for library in dict.fromkeys(self.vulnerable_libraries):
+                self.find_paths_from_vertex(library, reaching, writer)
                 # self.find_paths_from_vertex(library, [], set())
+        writer.flush()
 
         # if self.vulnerable_libraries:
         #     for dependency in self.direct_dependencies:
         #         self.find_paths_from_vertex(dependency)
 
+    def find_paths_parallel(self, writer=None, workers=None):
+        # Корни перебираются в процессах пула, граф передаётся каждому процессу один раз через
+        # initializer (при fork - вообще без копирования). Процесс возвращает не больше PATH_CHUNK
+        # путей и место, где остановился обход, так что память не зависит от числа путей у корня.
+        # Порции пишутся в порядке корней, и вывод совпадает с последовательным find_paths
+        if not self.frozen:
+            self.freeze()
+        if writer is None:
+            writer = PathWriter(sys.stdout)
+        if self.direct_dependencies and not writer.full:
+            reaching = self.find_reaching_vertices()
+            roots = [library for library in dict.fromkeys(self.vulnerable_libraries) if reaching[library]]
+            chunk = PATH_CHUNK if writer.limit is None else min(PATH_CHUNK, writer.limit)
+            window = workers or os.cpu_count() or 1
+            with multiprocessing.Pool(workers, initializer=init_path_worker,
+                                      initargs=(self, reaching, chunk)) as pool:
+                write_searches_in_order(pool, roots, writer, window)
+        writer.flush()
 
-def main():
+    def count_paths(self):
+        if not self.frozen:
+            self.freeze()
+        if not self.direct_dependencies:
+            return 0
+        reaching = self.find_reaching_vertices()
+        acyclic, counts = self.count_acyclic_paths(reaching)
+        return sum(self.count_paths_from_vertex(library, reaching, acyclic, counts)
+                   for library in dict.fromkeys(self.vulnerable_libraries))
+
+
+class PathWriter:
+    # Копит строки и пишет их в поток пачками, после limit путей перестаёт принимать новые
+    def __init__(self, output_stream, limit=None, buffer_size=4096):
+        self.output_stream = output_stream
+        self.limit = limit
+        self.buffer_size = buffer_size
+        self.count = 0
+        self.full = limit is not None and limit <= 0
+        self.lines = []
+
+    def write(self, line):
+        self.lines.append(line)
+        self.count += 1
+        if self.limit is not None and self.count >= self.limit:
+            self.full = True
+        if len(self.lines) >= self.buffer_size:
+            self.flush()
+
+    def write_block(self, text):
+        # Уже готовый кусок вывода: строки через '\n', в конце тоже '\n'
+        if not text:
+            return
+        count = text.count('\n')
+        if self.limit is not None and self.count + count >= self.limit:
+            count = self.limit - self.count
+            text = '\n'.join(text.split('\n')[:count]) + '\n'
+            self.full = True
+        self.flush()
+        self.output_stream.write(text)
+        self.count += count
+
+    def flush(self):
+        if self.lines:
+            self.output_stream.write('\n'.join(self.lines) + '\n')
+            self.lines = []
+
+
+def overlay_neighbours(offsets, targets, added, removed, vertex):
+    # Соседи vertex в замороженном CSR с поправками: added/removed - словари вершина -> множество
+    neighbours = targets[offsets[vertex]:offsets[vertex + 1]] if vertex + 1 < len(offsets) else ()
+    gone = removed.get(vertex)
+    if gone:
+        neighbours = [neighbour for neighbour in neighbours if neighbour not in gone]
+    extra = added.get(vertex)
+    if extra:
+        neighbours = list(neighbours)
+        neighbours.extend(extra)
+    return neighbours
+
+
+class ReachabilityIndex:
+    # Хранит замороженный граф (CSR в обе стороны) с поправками - добавленными и удалёнными после
+    # заморозки рёбрами - и для каждой уязвимой библиотеки bytearray достижимых из неё вершин
+    # и множество достижимых прямых зависимостей. Добавленное ребро только продолжает BFS у тех
+    # корней, которые уже доходили до его начала. Удалённые рёбра обрабатываются как delete-and-rederive:
+    # снимаются только вершины, достижимые через конец удалённого ребра, а потом заново помечаются те
+    # из них, у кого остался помеченный предок (по обратным рёбрам). В файле лежат массивы CSR,
+    # а не словари множеств, поэтому --apply читает и пишет его за время, близкое к копированию байтов
+    def __init__(self, graph):
+        if not graph.frozen:
+            graph.freeze()
+        self.graph = graph
+        self.added = {}
+        self.removed = {}
+        self.added_reverse = {}
+        self.removed_reverse = {}
+        self.reachable = {}
+        self.exposed = {}
+        for root in dict.fromkeys(graph.vulnerable_libraries):
+            self.rebuild(root)
+
+    def dependencies_of(self, library):
+        graph = self.graph
+        return overlay_neighbours(graph.offsets, graph.targets, self.added, self.removed, library)
+
+    def requirements_of(self, dependency):
+        graph = self.graph
+        return overlay_neighbours(graph.reverse_offsets, graph.reverse_targets,
+                                  self.added_reverse, self.removed_reverse, dependency)
+
+    def has_edge(self, library, dependency):
+        if dependency in self.added.get(library, ()):
+            return True
+        offsets = self.graph.offsets
+        if library + 1 >= len(offsets) or dependency in self.removed.get(library, ()):
+            return False
+        return dependency in self.graph.targets[offsets[library]:offsets[library + 1]]
+
+    def add_edge(self, library, dependency):
+        if self.has_edge(library, dependency):
+            return False
+        if dependency in self.removed.get(library, ()):
+            self.removed[library].discard(dependency)
+            self.removed_reverse[dependency].discard(library)
+        else:
+            self.added.setdefault(library, set()).add(dependency)
+            self.added_reverse.setdefault(dependency, set()).add(library)
+        return True
+
+    def remove_edge(self, library, dependency):
+        if not self.has_edge(library, dependency):
+            return False
+        if dependency in self.added.get(library, ()):
+            self.added[library].discard(dependency)
+            self.added_reverse[dependency].discard(library)
+        else:
+            self.removed.setdefault(library, set()).add(dependency)
+            self.removed_reverse.setdefault(dependency, set()).add(library)
+        return True
+
+    def overlay_size(self):
+        return sum(map(len, self.added.values())) + sum(map(len, self.removed.values()))
+
+    def compact(self):
+        # Вливает поправки в CSR, когда их становится слишком много
+        graph = self.graph
+        vertex_count = len(graph.names)
+        dependencies = {vertex: self.dependencies_of(vertex) for vertex in range(vertex_count)}
+        requirements = {vertex: self.requirements_of(vertex) for vertex in range(vertex_count)}
+        graph.offsets, graph.targets = graph.build_csr(dependencies, vertex_count)
+        graph.reverse_offsets, graph.reverse_targets = graph.build_csr(requirements, vertex_count)
+        self.added, self.removed, self.added_reverse, self.removed_reverse = {}, {}, {}, {}
+
+    def rebuild(self, root):
+        self.reachable[root] = bytearray(len(self.graph.names))
+        self.exposed[root] = set()
+        self.mark_from(root, root)
+
+    def mark_from(self, root, vertex):
+        reachable = self.reachable[root]
+        exposed = self.exposed[root]
+        direct = self.graph.direct_dependencies
+        reachable[vertex] = 1
+        queue = deque([vertex])
+        while queue:
+            vertex = queue.popleft()
+            if vertex in direct:
+                exposed.add(vertex)
+            for dependency in self.dependencies_of(vertex):
+                if not reachable[dependency]:
+                    reachable[dependency] = 1
+                    queue.append(dependency)
+
+    def unmark_from(self, root, vertices):
+        # Снимает пометку со всех помеченных вершин, достижимых из vertices, и возвращает их
+        reachable = self.reachable[root]
+        exposed = self.exposed[root]
+        queue = deque()
+        for vertex in vertices:
+            if reachable[vertex]:
+                reachable[vertex] = 0
+                queue.append(vertex)
+        unmarked = list(queue)
+        while queue:
+            vertex = queue.popleft()
+            exposed.discard(vertex)
+            for dependency in self.dependencies_of(vertex):
+                if reachable[dependency]:
+                    reachable[dependency] = 0
+                    queue.append(dependency)
+                    unmarked.append(dependency)
+        return unmarked
+
+    def apply(self, changes):
+        # changes - список (добавить ли, dependency, libraries) в том же смысле, что Graph.add_dependency
+        graph = self.graph
+        added = []
+        removed = []
+        for adding, dependency, libraries in changes:
+            if adding:
+                dependency = graph.intern(dependency)
+                for library in set(map(graph.intern, libraries)):
+                    if library != dependency and self.add_edge(library, dependency):
+                        added.append((library, dependency))
+            else:
+                dependency = graph.ids.get(dependency)
+                if dependency is None:
+                    continue
+                for library in set(map(graph.ids.get, libraries)):
+                    if library is not None and library != dependency and self.remove_edge(library, dependency):
+                        removed.append((library, dependency))
+
+        # Ребро могли добавить и удалить в одной пачке
+        added = [(library, dependency) for library, dependency in added if self.has_edge(library, dependency)]
+        vertex_count = len(graph.names)
+        for root, reachable in self.reachable.items():
+            if len(reachable) < vertex_count:
+                reachable.extend(bytes(vertex_count - len(reachable)))
+            # Путь, который шёл через удалённое ребро, после последнего такого ребра идёт по оставшимся
+            # рёбрам, так что всё, что могло пропасть, достижимо из концов удалённых рёбер
+            for vertex in self.unmark_from(root, [dependency for library, dependency in removed
+                                                  if reachable[library]]):
+                if not reachable[vertex] and (vertex == root or any(reachable[library]
+                                                                    for library in self.requirements_of(vertex))):
+                    self.mark_from(root, vertex)
+            for library, dependency in added:
+                if reachable[library] and not reachable[dependency]:
+                    self.mark_from(root, dependency)
+
+        if self.overlay_size() > len(graph.targets) // 4 + 1024:
+            self.compact()
+
+    def exposed_dependencies(self):
+        names = self.graph.names
+        return [(names[root], sorted(names[library] for library in self.exposed[root]))
+                for root in self.reachable]
+
+    def save(self, path):
+        # Только встроенные типы и array, чтобы файл не зависел от того, как запущен модуль
+        graph = self.graph
+        state = {
+            'names': graph.names,
+            'offsets': graph.offsets,
+            'targets': graph.targets,
+            'reverse_offsets': graph.reverse_offsets,
+            'reverse_targets': graph.reverse_targets,
+            'vulnerable_libraries': graph.vulnerable_libraries,
+            'direct_dependencies': graph.direct_dependencies,
+            'added': self.added,
+            'removed': self.removed,
+            'added_reverse': self.added_reverse,
+            'removed_reverse': self.removed_reverse,
+            'reachable': self.reachable,
+            'exposed': self.exposed,
+        }
+        with open(path, 'wb') as index_file:
+            pickle.dump(state, index_file, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as index_file:
+            state = pickle.load(index_file)
+
+        graph = Graph()
+        graph.names = state['names']
+        graph.ids = {library: library_id for library_id, library in enumerate(graph.names)}
+        graph.offsets = state['offsets']
+        graph.targets = state['targets']
+        graph.reverse_offsets = state['reverse_offsets']
+        graph.reverse_targets = state['reverse_targets']
+        graph.vulnerable_libraries = state['vulnerable_libraries']
+        graph.direct_dependencies = state['direct_dependencies']
+        graph.frozen = True
+
+        index = cls.__new__(cls)
+        index.graph = graph
+        for name in ('added', 'removed', 'added_reverse', 'removed_reverse', 'reachable', 'exposed'):
+            setattr(index, name, state[name])
+        return index
+
+
+# Сколько путей процесс пула ищет за одну задачу
+PATH_CHUNK = 4096
+# Сколько готовых порций может ждать своей очереди у одного корня
+BUFFERED_CHUNKS = 2
+
+worker_graph = None
+worker_reaching = None
+worker_limit = None
+
+
+def init_path_worker(graph, reaching, limit):
+    global worker_graph, worker_reaching, worker_limit
+    worker_graph, worker_reaching, worker_limit = graph, reaching, limit
+
+
+def find_paths_worker(task):
+    # task - (корень, None) для нового корня или (корень, (path, positions)) для продолжения
+    vertex, state = task
+    output = io.StringIO()
+    writer = PathWriter(output, worker_limit)
+    if state is None:
+        state = worker_graph.find_paths_from_vertex(vertex, worker_reaching, writer)
+    else:
+        state = worker_graph.continue_paths(*state, worker_reaching, writer)
+    writer.flush()
+    return output.getvalue(), state
+
+
+class RootSearch:
+    # Поиск от одного корня в пуле: задача в работе (result), место остановки, с которого ещё
+    # не запущено продолжение (state), и готовые порции вывода, ждущие своей очереди (chunks)
+    def __init__(self, pool, root):
+        self.pool = pool
+        self.root = root
+        self.state = None
+        self.chunks = deque()
+        self.result = pool.apply_async(find_paths_worker, ((root, None),))
+
+    def poll(self):
+        if self.result is not None and self.result.ready():
+            text, self.state = self.result.get()
+            self.result = None
+            self.chunks.append(text)
+        if self.result is None and self.state is not None and len(self.chunks) < BUFFERED_CHUNKS:
+            self.result = self.pool.apply_async(find_paths_worker, ((self.root, self.state),))
+            self.state = None
+
+    def finished(self):
+        return self.result is None and self.state is None and not self.chunks
+
+
+def write_searches_in_order(pool, roots, writer, window):
+    # Одновременно идут поиски от window корней подряд, у каждого не больше BUFFERED_CHUNKS порций
+    # в памяти. Пишутся только порции первого корня, остальные копятся, пока его поиск не закончится
+    roots = iter(roots)
+    searches = deque()
+    while True:
+        while len(searches) < window:
+            root = next(roots, None)
+            if root is None:
+                break
+            searches.append(RootSearch(pool, root))
+        if not searches:
+            return
+
+        for search in searches:
+            search.poll()
+        head = searches[0]
+        if head.chunks:
+            writer.write_block(head.chunks.popleft())
+            if writer.full:
+                return
+        elif head.finished():
+            searches.popleft()
+        else:
+            head.result.wait()
+
+
+def read_graph():
     graph = Graph()
 
     try:
@@ -100,7 +663,7 @@ def main():
             graph.add_direct_dependency(library)
 
     except (EOFError, KeyboardInterrupt):
-        return
+        return None
 
     while True:
         try:
@@ -117,7 +680,59 @@ def main():
         except (EOFError, KeyboardInterrupt):
             break
 
-    graph.find_paths()
+    return graph
+
+
+def read_changes():
+    # Строки вида "+ dependency library..." или "- dependency library..."
+    changes = []
+    for line in sys.stdin:
+        data = line.split()
+        if len(data) >= 3 and data[0] in ('+', '-'):
+            changes.append((data[0] == '+', data[1], data[2:]))
+    return changes
+
+
+def print_exposed(index):
+    lines = [' '.join([root] + exposed) for root, exposed in index.exposed_dependencies() if exposed]
+    if lines:
+        sys.stdout.write('\n'.join(lines) + '\n')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--count-only', action='store_true', help='print only the number of paths')
+    parser.add_argument('--limit', type=int, default=None, help='print at most LIMIT paths')
+    parser.add_argument('--parallel', action='store_true', help='search from each vulnerable library in a worker process')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--index', default=None,
+                        help='save the graph and the exposed direct dependencies of each vulnerable library to INDEX')
+    parser.add_argument('--apply', action='store_true',
+                        help='read "+/- dependency library..." edge changes into INDEX; only the affected '
+                             'reachability is recomputed, loading and saving INDEX is a copy of its arrays')
+    args = parser.parse_args()
+
+    if args.index and args.apply:
+        index = ReachabilityIndex.load(args.index)
+        index.apply(read_changes())
+        index.save(args.index)
+        print_exposed(index)
+        return
+
+    graph = read_graph()
+    if graph is None:
+        return
+
+    if args.index:
+        index = ReachabilityIndex(graph)
+        index.save(args.index)
+        print_exposed(index)
+    elif args.count_only:
+        print(graph.count_paths())
+    elif args.parallel:
+        graph.find_paths_parallel(PathWriter(sys.stdout, args.limit), args.workers)
+    else:
+        graph.find_paths(PathWriter(sys.stdout, args.limit))
 
 
 if __name__ == '__main__':
@@ -1,5 +1,10 @@
+import heapq
 import re
 import sys
+from itertools import chain
+
+# Сколько родителей печатать за одну запись в поток
+PRINT_CHUNK = 1024
 
 
 class Node:
@@ -12,6 +17,8 @@ class MinHeap:
     def __init__(self):
         self.__nodes_list = []
         self.__index_dict = {}
+        # Для max: куча из -key с ленивым удалением, устаревшие ключи отбрасываются по __index_dict
+        self.__max_keys = []
 
     def __sift_down(self, parent_index):
         while True:
@@ -47,9 +54,16 @@ class MinHeap:
             self.__nodes_list.append(Node(key, value))
             self.__index_dict[key] = len(self.__nodes_list) - 1
             self.__sift_up(self.__index_dict[key])
+            self.__push_max_key(key)
         else:
             raise ValueError("Element already exists")
 
+    def __push_max_key(self, key):
+        heapq.heappush(self.__max_keys, -key)
+        if len(self.__max_keys) > 2 * len(self.__nodes_list) + 16:
+            self.__max_keys = [-key for key in self.__index_dict]
+            heapq.heapify(self.__max_keys)
+
     def delete(self, key):
         if key in self.__index_dict:
             index = self.__index_dict.pop(key)
@@ -67,17 +81,35 @@ class MinHeap:
             raise KeyError("No such element")
 
     def set(self, key, new_value):
+        # Индекс 0 - это корень, а не "не найдено"; ключ не меняется, так что просеивать нечего
         node_index = self.__index_dict.get(key)
-        if node_index:
-            self.__sift_up(node_index)
-            self.__sift_down(node_index)
+        if node_index is not None:
             self.__nodes_list[node_index].value = new_value
         else:
             raise KeyError("No such element")
 
+    def update_key(self, old_key, new_key):
+        if old_key not in self.__index_dict:
+            raise KeyError("No such element")
+        if new_key == old_key:
+            return
+        if new_key in self.__index_dict:
+            raise ValueError("Element already exists")
+        index = self.__index_dict.pop(old_key)
+        self.__nodes_list[index].key = new_key
+        self.__index_dict[new_key] = index
+        if new_key < old_key:
+            self.__sift_up(index)
+        else:
+            self.__sift_down(index)
+        self.__push_max_key(new_key)
+
     def max(self):
         if self.__nodes_list:
-            return max(self.__nodes_list[len(self.__nodes_list) // 2:], key=lambda x: x.key)
+            max_keys = self.__max_keys
+            while -max_keys[0] not in self.__index_dict:
+                heapq.heappop(max_keys)
+            return self.__nodes_list[self.__index_dict[-max_keys[0]]]
         raise ValueError("Heap is empty")
 
     def min(self):
@@ -99,29 +131,40 @@ class MinHeap:
         index = self.get_index(key)
         return None if index is None else self.__nodes_list[index]
 
-    def __format_node(self, node, parent_index=None):
-        if parent_index is None:
-            return f'[{node.key} {node.value}]'
-        return f'[{node.key} {node.value} {self.__nodes_list[parent_index].key}]'
-
-    def __get_layer_nodes(self, start, end, layer_size):
-        nodes = []
-        for i in range(start, min(end, len(self.__nodes_list))):
-            parent_index = (i - 1) // 2 if i != 0 else None
-            nodes.append(self.__format_node(self.__nodes_list[i], parent_index))
-        nodes.extend(['_'] * (layer_size - len(nodes)))
-        return nodes
+    def __format_layer_part(self, start, end):
+        # start - 1 чётно, так что каждый родитель из среза повторяется ровно для двух детей
+        nodes = self.__nodes_list
+        parents = nodes[(start - 1) // 2:(end - 2) // 2 + 1]
+        return ' '.join([f'[{node.key} {node.value} {parent.key}]'
+                         for node, parent in zip(nodes[start:end], chain.from_iterable(zip(parents, parents)))])
 
     def print_heap(self, output_stream=sys.stdout):
+        # Слой пишется в поток частями по PRINT_CHUNK родителей, а не собирается целиком в список
         if not self.__nodes_list:
             print("_", file=output_stream)
             return
 
-        layer, index = 1, 0
-        while index < len(self.__nodes_list):
-            layer_end = index + layer
-            print(' '.join(self.__get_layer_nodes(index, layer_end, layer)), file=output_stream)
-            index = layer_end
+        write = output_stream.write
+        size = len(self.__nodes_list)
+        root = self.__nodes_list[0]
+        write(f'[{root.key} {root.value}]\n')
+
+        step = 2 * PRINT_CHUNK
+        layer, index = 2, 1
+        while index < size:
+            layer_end = min(index + layer, size)
+            for part_start in range(index, layer_end, step):
+                if part_start != index:
+                    write(' ')
+                write(self.__format_layer_part(part_start, min(part_start + step, layer_end)))
+            missing = index + layer - layer_end
+            if missing:
+                blanks = ' _' * min(missing, step)
+                for _ in range(missing // step):
+                    write(blanks)
+                write(' _' * (missing % step))
+            write('\n')
+            index += layer
             layer *= 2
 
 
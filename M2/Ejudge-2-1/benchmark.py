@@ -0,0 +1,284 @@
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from splay_core import ENGINES, ConcurrentSplayTree, SplayTree, SplayTreeError, TopDownSplayTree
+
+
+def generate_operations(count, seed=0):
+    rng = random.Random(seed)
+    key_range = max(count // 2, 1)
+    return [(rng.random() < 0.5, rng.randrange(key_range)) for _ in range(count)]
+
+
+def run(tree, operations):
+    for adding, key in operations:
+        if adding:
+            try:
+                tree.add(key, "v")
+            except Exception:
+                pass
+        else:
+            tree.search(key)
+
+
+def memory_per_key(engine, count):
+    keys = list(range(count))
+    random.Random(1).shuffle(keys)
+    tracemalloc.start()
+    tree = engine()
+    for key in keys:
+        tree.add(key, "v")
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return size / count
+
+
+def generate_accesses(pattern, keys, count, seed=0):
+    rng = random.Random(seed)
+    if pattern == 'sequential':
+        ordered = sorted(keys)
+        return [ordered[i % len(ordered)] for i in range(count)]
+    if pattern == 'random':
+        return [rng.choice(keys) for _ in range(count)]
+    # Zipf с s = 1.1 по случайно переставленным ключам
+    ranked = keys[:]
+    rng.shuffle(ranked)
+    weights = [1 / rank ** 1.1 for rank in range(1, len(ranked) + 1)]
+    return rng.choices(ranked, weights, k=count)
+
+
+def count_bottom_up_rotations(keys, accesses):
+    # У SplayTree нет счётчика, поэтому на время прогона оборачиваем повороты
+    rotations = 0
+    rotate_left, rotate_right = SplayTree._SplayTree__rotate_left, SplayTree._SplayTree__rotate_right
+
+    def counted(rotate):
+        def wrapper(self, node):
+            nonlocal rotations
+            rotations += 1
+            rotate(self, node)
+        return wrapper
+
+    SplayTree._SplayTree__rotate_left = counted(rotate_left)
+    SplayTree._SplayTree__rotate_right = counted(rotate_right)
+    try:
+        tree = SplayTree()
+        for key in keys:
+            tree.add(key, "v")
+        rotations = 0
+        for key in accesses:
+            tree.search(key)
+    finally:
+        SplayTree._SplayTree__rotate_left, SplayTree._SplayTree__rotate_right = rotate_left, rotate_right
+    return rotations
+
+
+def count_top_down_rotations(keys, accesses):
+    # Повороты плюс переносы в левое/правое дерево: столько же шагов, сколько поворотов у SplayTree
+    # на той же глубине, так что числа сравнимы. Отдельно возвращаются и сами повороты
+    tree = TopDownSplayTree()
+    for key in keys:
+        tree.add(key, "v")
+    tree.rotations = tree.links = 0
+    for key in accesses:
+        tree.search(key)
+    return tree.rotations + tree.links, tree.rotations
+
+
+def time_accesses(engine, keys, accesses):
+    tree = engine()
+    for key in keys:
+        tree.add(key, "v")
+    start = time.perf_counter()
+    for key in accesses:
+        tree.search(key)
+    return time.perf_counter() - start
+
+
+def time_rate(engine, keys, accesses):
+    elapsed = time_accesses(engine, keys, accesses)
+    return f"{len(accesses) / elapsed:10,.0f} searches/s ({elapsed:.2f} s)"
+
+
+def compare_splay_directions(key_count, access_count):
+    keys = list(range(key_count))
+    random.Random(2).shuffle(keys)
+    print(f"search patterns: {key_count:,} keys, {access_count:,} searches")
+    for pattern in ('sequential', 'random', 'zipf'):
+        accesses = generate_accesses(pattern, keys, access_count)
+        bottom_up = count_bottom_up_rotations(keys, accesses)
+        print(f"{pattern:>10} bottomup: {bottom_up / access_count:6.2f} rotations/search, "
+              f"{time_rate(SplayTree, keys, accesses)}")
+        top_down, zig_zig_rotations = count_top_down_rotations(keys, accesses)
+        print(f"{pattern:>10}  topdown: {top_down / access_count:6.2f} rotations/search "
+              f"(zig-zig rotations {zig_zig_rotations / access_count:.2f} + links "
+              f"{(top_down - zig_zig_rotations) / access_count:.2f}), {time_rate(TopDownSplayTree, keys, accesses)}")
+
+
+def compare_ordered_index(key_count, query_count):
+    items = [(key, "v") for key in range(key_count)]
+    start = time.perf_counter()
+    tree = SplayTree()
+    for key, value in items:
+        tree.add(key, value)
+    added = time.perf_counter() - start
+    start = time.perf_counter()
+    SplayTree().bulk_load(items)
+    loaded = time.perf_counter() - start
+    print(f"load {key_count:,} sorted keys: add {added:.2f} s, bulk_load {loaded:.2f} s")
+
+    rng = random.Random(3)
+    queries = [sorted((rng.randrange(key_count), rng.randrange(key_count))) for _ in range(query_count)]
+    for track_sizes in (False, True):
+        tree = SplayTree(track_sizes=track_sizes)
+        tree.bulk_load(items)
+        # Без размеров count обходит весь диапазон, поэтому запросов меньше
+        batch = queries if track_sizes else queries[:max(query_count // 10, 1)]
+        start = time.perf_counter()
+        for lo, hi in batch:
+            tree.count(lo, hi)
+        elapsed = time.perf_counter() - start
+        print(f"count, track_sizes={track_sizes!s:>5}: {len(batch) / elapsed:10,.0f} queries/s ({elapsed:.2f} s)")
+
+
+def compare_snapshot(key_count):
+    keys = list(range(key_count))
+    random.Random(5).shuffle(keys)
+    start = time.perf_counter()
+    tree = SplayTree()
+    for key in keys:
+        tree.add(key, f"v{key}")
+    replayed = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'tree.snapshot')
+        start = time.perf_counter()
+        tree.dump(path)
+        dumped = time.perf_counter() - start
+        start = time.perf_counter()
+        SplayTree().load(path)
+        loaded = time.perf_counter() - start
+        size = os.path.getsize(path)
+    print(f"snapshot of {key_count:,} keys ({size / (1 << 20):.1f} MiB): replay adds {replayed:.2f} s, "
+          f"dump {dumped:.2f} s, load {loaded:.2f} s")
+
+
+def concurrent_lookups(tree, mode, keys, batch_size):
+    if mode == 'search_many':
+        for i in range(0, len(keys), batch_size):
+            tree.search_many(keys[i:i + batch_size])
+    else:
+        lookup = tree.search if mode == 'search' else tree.peek
+        for key in keys:
+            lookup(key)
+
+
+def concurrent_writes(tree, key_count, stop):
+    rng = random.Random(7)
+    while not stop.is_set():
+        key = key_count + rng.randrange(key_count)
+        try:
+            tree.add(key, "w")
+            tree.delete(key)
+        except SplayTreeError:
+            pass
+
+
+def compare_concurrent(key_count, lookups_per_thread, batch_size=64):
+    # Читатели делят дерево с одним пишущим потоком, который всё время добавляет и удаляет ключи
+    tree = ConcurrentSplayTree()
+    keys = list(range(key_count))
+    random.Random(6).shuffle(keys)
+    for key in keys:
+        tree.add(key, "v")
+
+    print(f"concurrent: {key_count:,} keys, {lookups_per_thread:,} lookups per reader, one writer")
+    for threads in (1, 2, 4, 8):
+        rng = random.Random(threads)
+        workloads = [[rng.randrange(key_count) for _ in range(lookups_per_thread)] for _ in range(threads)]
+        results = []
+        for mode in ('search', 'search_many', 'peek'):
+            stop = threading.Event()
+            writer = threading.Thread(target=concurrent_writes, args=(tree, key_count, stop))
+            readers = [threading.Thread(target=concurrent_lookups, args=(tree, mode, workload, batch_size))
+                       for workload in workloads]
+            writer.start()
+            start = time.perf_counter()
+            for reader in readers:
+                reader.start()
+            for reader in readers:
+                reader.join()
+            elapsed = time.perf_counter() - start
+            stop.set()
+            writer.join()
+            results.append(f"{mode} {threads * lookups_per_thread / elapsed:9,.0f}/s")
+        print(f"{threads} reader(s): " + ", ".join(results))
+
+
+def compare_stats_overhead(operations):
+    # Без stats дерево выполняет тот же код, что и раньше, со stats - считает каждый сплей
+    for stats in (False, True):
+        tree = SplayTree(stats=stats)
+        start = time.perf_counter()
+        run(tree, operations)
+        elapsed = time.perf_counter() - start
+        print(f"stats={stats!s:>5}: {len(operations) / elapsed:10,.0f} add/search ops/s ({elapsed:.2f} s)")
+    summary = tree.stats()
+    print(f"  max depth {summary['max_depth']}, {summary['rotations_per_operation']:.2f} rotations/op "
+          f"(zig {summary['zig']}, zig-zig {summary['zig_zig']}, zig-zag {summary['zig_zag']})")
+
+
+def compare_parsers(count):
+    # Весь CLI целиком: старый разбор регулярками с print на каждый результат против --fast
+    rng = random.Random(4)
+    lines = []
+    for _ in range(count):
+        command = rng.choice(('add', 'add', 'set', 'delete', 'search', 'search', 'min', 'max'))
+        if command in ('add', 'set'):
+            lines.append(f"{command} {rng.randrange(1000)} v{rng.randrange(100)}\n")
+        elif command in ('delete', 'search'):
+            lines.append(f"{command} {rng.randrange(1000)}\n")
+        else:
+            lines.append(command + "\n")
+
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'main.py')
+    with tempfile.TemporaryFile('w+') as commands_file:
+        commands_file.writelines(lines)
+        for flags in ([], ['--fast']):
+            commands_file.seek(0)
+            start = time.perf_counter()
+            subprocess.run([sys.executable, script] + flags, stdin=commands_file, stdout=subprocess.DEVNULL, check=True)
+            elapsed = time.perf_counter() - start
+            print(f"cli {' '.join(flags) or 'regex':>8}: {count / elapsed:10,.0f} commands/s ({elapsed:.2f} s)")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000
+    operations = generate_operations(count)
+
+    for name, engine in ENGINES.items():
+        print(f"{name:>8}: {memory_per_key(engine, 100_000):6.1f} bytes/key", end="")
+        tree = engine()
+        start = time.perf_counter()
+        run(tree, operations)
+        elapsed = time.perf_counter() - start
+        print(f", {count / elapsed:10,.0f} add/search ops/s ({elapsed:.2f} s)")
+
+    compare_splay_directions(100_000, min(count, 1_000_000))
+    compare_ordered_index(1_000_000, 200)
+    compare_snapshot(1_000_000)
+    compare_concurrent(100_000, 100_000)
+    compare_stats_overhead(operations[:1_000_000])
+    compare_parsers(min(count, 5_000_000))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,237 +1,112 @@
-# Сделал вывод "error" в методах дерева через исключения
-# Вместо принтов в методах search, min, max теперь возвращается нода
-# Ну и вывод дерева в пользовательский поток
-
+import argparse
+import io
+import os
 import re
 import sys
-from collections import deque
 
+# Само дерево лежит в M2/splay_core.py, общем с Alternative/a-splay.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-# from memory_profiler import profile
+from splay_core import ENGINES, SplayTree, SplayTreeError
 
-class SplayTreeError(Exception):
-    pass
+# Сколько символов вывода копить перед записью в stdout
+OUTPUT_THRESHOLD = 1 << 16
 
 
-class Node:
-    def __init__(self, key, value, parent=None):
-        self.key = key
-        self.value = value
-        self.left = None
-        self.right = None
-        self.parent = parent
+def is_key(text):
+    # То же, что [-+]?\d+ в регулярках: \d - это ровно str.isdecimal()
+    if text[:1] in ('-', '+'):
+        text = text[1:]
+    return text.isdecimal()
 
 
-class SplayTree:
-    def __init__(self):
-        self.__root = None
+def is_value(text):
+    # То же, что \S*: ни одного пробельного символа
+    return text.isalnum() or not text or text.split() == [text]
 
-    def __rotate_left(self, x):
-        y = x.right
-        x.right = y.left
-        if y.left:
-            y.left.parent = x
-        y.parent = x.parent
-        if x.parent is None:
-            self.__root = y
-        elif x == x.parent.left:
-            x.parent.left = y
-        else:
-            x.parent.right = y
-        y.left = x
-        x.parent = y
-
-    def __rotate_right(self, x):
-        y = x.left
-        x.left = y.right
-        if y.right:
-            y.right.parent = x
-        y.parent = x.parent
-        if x.parent is None:
-            self.__root = y
-        elif x == x.parent.right:
-            x.parent.right = y
-        else:
-            x.parent.left = y
-        y.right = x
-        x.parent = y
-
-    def __splay(self, node):
-        while node.parent:
-            # Zig
-            if node.parent.parent is None:
-                if node == node.parent.left:
-                    self.__rotate_right(node.parent)
-                else:
-                    self.__rotate_left(node.parent)
-            # Zig-Zig
-            elif node == node.parent.left and node.parent == node.parent.parent.left:
-                self.__rotate_right(node.parent.parent)
-                self.__rotate_right(node.parent)
-            elif node == node.parent.right and node.parent == node.parent.parent.right:
-                self.__rotate_left(node.parent.parent)
-                self.__rotate_left(node.parent)
-            # Zig-Zag
-            elif node == node.parent.right and node.parent == node.parent.parent.left:
-                self.__rotate_left(node.parent)
-                self.__rotate_right(node.parent)
-            elif node == node.parent.left and node.parent == node.parent.parent.right:
-                self.__rotate_right(node.parent)
-                self.__rotate_left(node.parent)
-        self.__root = node
-
-    def add(self, key, value):
-        if not self.__root:
-            self.__root = Node(key, value)
-            return
-        node = self.__root
-        while True:
-            if key < node.key:
-                if node.left:
-                    node = node.left
-                else:
-                    node.left = Node(key, value, parent=node)
-                    self.__splay(node.left)
-                    break
-            elif key > node.key:
-                if node.right:
-                    node = node.right
-                else:
-                    node.right = Node(key, value, parent=node)
-                    self.__splay(node.right)
-                    break
-            else:
-                self.__splay(node)
-                raise SplayTreeError("Element with this key already exists")
 
-    def delete(self, key):
-        node_to_delete = self.__search(key)
-        if not node_to_delete:
-            raise SplayTreeError("Element with this key was not found")
+def has_key_and_value(arguments):
+    return len(arguments) == 3 and is_key(arguments[1]) and is_value(arguments[2])
 
-        if node_to_delete.left:
-            left_subtree = node_to_delete.left
-            left_subtree.parent = None
 
-            if node_to_delete.right:
-                right_subtree = node_to_delete.right
+def has_key(arguments):
+    return len(arguments) == 2 and is_key(arguments[1])
 
-                max_node = self.__max(left_subtree)
 
-                max_node.right = right_subtree
-                right_subtree.parent = max_node
+def has_nothing(arguments):
+    return len(arguments) == 1
 
-                self.__root = max_node
-            else:
-                self.__root = left_subtree
-        else:
-            self.__root = node_to_delete.right
-            if self.__root:
-                self.__root.parent = None
-
-    def __search(self, key):
-        node = self.__root
-        while node:
-            if key < node.key:
-                if node.left is None:
-                    self.__splay(node)
-                    break
-                node = node.left
-            elif key > node.key:
-                if node.right is None:
-                    self.__splay(node)
-                    break
-                node = node.right
-            else:
-                self.__splay(node)
-                return node
-        return None
-
-    def search(self, key):
-        node = self.__search(key)
-        if node:
-            return self.__root  # Хотел возвращать только значение, но исходя из требуемого функционала для min/max
-        else:                   # Скорее всего предполагается что тут тоже нужно возвращать ноду
-            return None
-
-    def set(self, key, value):
-        node = self.__search(key)
-        if node:
-            self.__root.value = value
-        else:
-            raise SplayTreeError("Element with this key was not found")
-
-    def __min(self, node):
-        while node.left is not None:
-            node = node.left
-        self.__splay(node)
-        return node
-
-    def __max(self, node):
-        while node.right is not None:
-            node = node.right
-        self.__splay(node)
-        return node
-
-    def min(self):
-        if self.__root:
-            min_node = self.__min(self.__root)
-            return min_node
-        raise SplayTreeError("Splay tree is empty")
-
-    def max(self):
-        if self.__root:
-            max_node = self.__max(self.__root)
-            return max_node
-        raise SplayTreeError("Splay tree is empty")
-
-    # @profile
-    def print_tree(self, output_stream=sys.stdout):
-        if not self.__root:
-            print("_", file=output_stream)
-            return
-
-        print(f"[{self.__root.key} {self.__root.value}]", file=output_stream)
-
-        level_length = 2
-        count = 0
-        join_buffer_count = 0
-        queue = deque()
-        queue.appendleft(self.__root.left)
-        queue.appendleft(self.__root.right)
-        line = []
-
-        while True:
-            node = queue.pop()
-            join_buffer_count += 1
-            count += 1
-            if node:
-                line.append(f"[{node.key} {node.value} {node.parent.key}]")
-                queue.appendleft(node.left)
-                queue.appendleft(node.right)
-            else:
-                line.append("_")
-                queue.appendleft(None)
-                queue.appendleft(None)
-
-            if join_buffer_count == 1000:
-                print(" ".join(line), end=" ", file=output_stream)
-                join_buffer_count = 0
-                line = []
-
-            if count == level_length:
-                print(" ".join(line), file=output_stream)
-                join_buffer_count = 0
-                line = []
-                level_length *= 2
-                count = 0
-                if not any(queue):
-                    break
 
+def command_add(tree, arguments, output):
+    tree.add(int(arguments[1]), arguments[2])
 
-def main():
-    output_stream = sys.stdout
-    splay_tree = SplayTree()
+
+def command_set(tree, arguments, output):
+    tree.set(int(arguments[1]), arguments[2])
+
+
+def command_delete(tree, arguments, output):
+    tree.delete(int(arguments[1]))
+
+
+def command_search(tree, arguments, output):
+    node = tree.search(int(arguments[1]))
+    output.write(f"1 {node.value}\n" if node else "0\n")
+
+
+def command_min(tree, arguments, output):
+    node = tree.min()
+    output.write(f"{node.key} {node.value}\n")
+
+
+def command_max(tree, arguments, output):
+    node = tree.max()
+    output.write(f"{node.key} {node.value}\n")
+
+
+def command_print(tree, arguments, output):
+    tree.print_tree(output_stream=output)
+
+
+# Команда -> (обработчик, проверка всей разрезанной строки)
+FAST_COMMANDS = {
+    'add': (command_add, has_key_and_value),
+    'set': (command_set, has_key_and_value),
+    'delete': (command_delete, has_key),
+    'search': (command_search, has_key),
+    'min': (command_min, has_nothing),
+    'max': (command_max, has_nothing),
+    'print': (command_print, has_nothing),
+}
+
+
+def run_fast(splay_tree, input_stream, output_stream):
+    # Строка режется один раз по одиночным пробелам, как в регулярках, команда ищется в таблице,
+    # а вывод копится в одном буфере
+    output = io.StringIO()
+    try:
+        for line in input_stream:
+            if line == "\n":
+                continue
+            arguments = (line[:-1] if line[-1] == "\n" else line).split(" ")
+            command = FAST_COMMANDS.get(arguments[0])
+            if command is None or not command[1](arguments):
+                output.write("error\n")
+                continue
+            try:
+                command[0](splay_tree, arguments, output)
+            except SplayTreeError:
+                output.write("error\n")
+            if output.tell() >= OUTPUT_THRESHOLD:
+                output_stream.write(output.getvalue())
+                output.seek(0)
+                output.truncate()
+    finally:
+        # Старый разбор падает на ключах длиннее 4300 цифр, успев напечатать всё до них, - так же и здесь
+        output_stream.write(output.getvalue())
+
+
+def run_lines(splay_tree, input_stream, output_stream):
     command_patterns = [
         re.compile(r'^add ([-+]?\d+) (\S*)$'),
         re.compile(r'^set ([-+]?\d+) (\S*)$'),
@@ -243,7 +118,7 @@ def main():
     ]
 
     # try:
-    for line in sys.stdin:
+    for line in input_stream:
         if not line or line == "\n":
             continue
         try:
@@ -280,5 +155,39 @@ def main():
     #     return 0
 
 
+def print_stats(stats, output_stream):
+    operations = " ".join(f"{name}={count}" for name, count in sorted(stats['operations'].items()))
+    print(f"operations: {operations or '-'}", file=output_stream)
+    print(f"splays: {stats['splays']}, rotations: {stats['rotations']} (zig {stats['zig']}, "
+          f"zig-zig {stats['zig_zig']}, zig-zag {stats['zig_zag']}), "
+          f"rotations per operation: {stats['rotations_per_operation']:.2f}", file=output_stream)
+    print(f"max depth: {stats['max_depth']}", file=output_stream)
+    for operation, histogram in sorted(stats['depth_histogram'].items()):
+        depths = " ".join(f"{depth}:{count}" for depth, count in histogram.items())
+        print(f"depth histogram {operation}: {depths}", file=output_stream)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--engine', choices=ENGINES, default='pointer')
+    parser.add_argument('--fast', action='store_true', help='split-based parser with buffered output')
+    parser.add_argument('--stats', action='store_true', help='print splay statistics to stderr at exit')
+    args = parser.parse_args()
+    if args.stats and args.engine != 'pointer':
+        parser.error("--stats is only available for the pointer engine")
+
+    output_stream = sys.stdout
+    splay_tree = SplayTree(stats=True) if args.stats else ENGINES[args.engine]()
+    try:
+        if args.fast:
+            run_fast(splay_tree, sys.stdin, output_stream)
+        else:
+            run_lines(splay_tree, sys.stdin, output_stream)
+    finally:
+        if args.stats:
+            output_stream.flush()
+            print_stats(splay_tree.stats(), sys.stderr)
+
+
 if __name__ == "__main__":
     main()
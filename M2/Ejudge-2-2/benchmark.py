@@ -0,0 +1,233 @@
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from main import ENGINES, ArrayMinHeap, MinHeap, MinHeapError
+
+
+def fill(heap, size, seed=0):
+    keys = random.Random(seed).sample(range(size * 4), size)
+    for key in keys:
+        heap.add(key, "v")
+    return keys
+
+
+def interleaved_max(size, rounds, seed=0):
+    # add, max и extract вперемешку на куче постоянного размера
+    rng = random.Random(seed)
+    heap = MinHeap()
+    fill(heap, size, seed)
+    next_key = size * 4
+    start = time.perf_counter()
+    for _ in range(rounds):
+        # Новый ключ становится то новым максимумом, то новым минимумом, который тут же извлекается
+        key = next_key + rng.randrange(size)
+        heap.add(key if rng.random() < 0.5 else -key, "v")
+        next_key += size
+        heap.max()
+        heap.extract()
+    return time.perf_counter() - start
+
+
+def memory_per_entry(engine, count):
+    tracemalloc.start()
+    heap = engine()
+    fill(heap, count)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return size / count
+
+
+def compare_engines(count):
+    keys = random.Random(1).sample(range(count * 4), count)
+    print(f"engines: {count:,} adds, then {count:,} extracts")
+    for name, engine in ENGINES.items():
+        heap = engine()
+        start = time.perf_counter()
+        for key in keys:
+            heap.add(key, "v")
+        added = time.perf_counter() - start
+        start = time.perf_counter()
+        for _ in range(count):
+            heap.extract()
+        extracted = time.perf_counter() - start
+        print(f"{name:>6}: {memory_per_entry(engine, min(count, 1_000_000)):6.1f} bytes/entry, "
+              f"{count / added:10,.0f} adds/s, {count / extracted:10,.0f} extracts/s")
+
+
+def compare_bulk(count):
+    items = [(key, "v") for key in random.Random(2).sample(range(count * 4), count)]
+    print(f"bulk: {count:,} items")
+    for name, engine in ENGINES.items():
+        heap = engine()
+        start = time.perf_counter()
+        for key, value in items:
+            heap.add(key, value)
+        added = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(count):
+            heap.extract()
+        extracted = time.perf_counter() - start
+
+        heap = engine()
+        start = time.perf_counter()
+        heap.bulk_add(items)
+        heapified = time.perf_counter() - start
+
+        start = time.perf_counter()
+        heap.extract_many(count)
+        extracted_many = time.perf_counter() - start
+        print(f"{name:>6}: add {added:.2f} s, bulk_add {heapified:.2f} s; "
+              f"extract {extracted:.2f} s, extract_many {extracted_many:.2f} s")
+
+
+def compare_cli_batches(count, run_length=100):
+    # Команды идут сериями add и extract, как в логах, где кучу то наполняют, то вычерпывают
+    rng = random.Random(3)
+    lines = []
+    while len(lines) < count:
+        for _ in range(run_length):
+            lines.append(f"add {rng.randrange(count * 4)} v\n")
+        lines.extend(["extract\n"] * (run_length // 2))
+        lines.append("max\n")
+
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'main.py')
+    with tempfile.TemporaryFile('w+') as commands_file:
+        commands_file.writelines(lines)
+        for flags in ([], ['--batch'], ['--engine', 'array'], ['--engine', 'array', '--batch']):
+            commands_file.seek(0)
+            start = time.perf_counter()
+            subprocess.run([sys.executable, script] + flags, stdin=commands_file, stdout=subprocess.DEVNULL, check=True)
+            elapsed = time.perf_counter() - start
+            print(f"cli {' '.join(flags) or 'default':>22}: {len(lines) / elapsed:10,.0f} commands/s ({elapsed:.2f} s)")
+
+
+def arity_workload(kind, count, seed=0):
+    # Список (команда, ключ) для кучи, заранее наполненной ключами 0..count-1
+    rng = random.Random(seed)
+    next_key = count
+    operations = []
+    for _ in range(count):
+        roll = rng.random()
+        if kind == 'insert-heavy':
+            command = 'add' if roll < 0.9 else 'extract'
+        elif kind == 'extract-heavy':
+            command = 'extract' if roll < 0.7 else 'add'
+        else:
+            command = 'add' if roll < 0.3 else 'extract' if roll < 0.5 else 'delete' if roll < 0.75 else 'set'
+        if command == 'add':
+            operations.append((command, next_key - rng.randrange(2 * count)))
+            next_key += 1
+        else:
+            operations.append((command, rng.randrange(next_key)))
+    return operations
+
+
+def replay_arity_workload(heap, operations):
+    for command, key in operations:
+        try:
+            if command == 'add':
+                heap.add(key, "v")
+            elif command == 'extract':
+                heap.extract()
+            elif command == 'delete':
+                heap.delete(key)
+            else:
+                heap.set(key, "w")
+        except MinHeapError:
+            pass
+
+
+def compare_arities(count):
+    heaps = [('node d=2', MinHeap)] + [(f"array d={arity}", lambda arity=arity: ArrayMinHeap(arity=arity))
+                                      for arity in (2, 4, 8)]
+    items = [(key, "v") for key in range(count)]
+    print(f"arities: heap of {count:,}, {count:,} operations")
+    for kind in ('insert-heavy', 'extract-heavy', 'mixed'):
+        operations = arity_workload(kind, count)
+        results = []
+        for name, engine in heaps:
+            heap = engine()
+            heap.bulk_add(items)
+            start = time.perf_counter()
+            replay_arity_workload(heap, operations)
+            elapsed = time.perf_counter() - start
+            results.append(f"{name} {count / elapsed:9,.0f}/s")
+        print(f"{kind:>13}: " + ", ".join(results))
+
+
+def compare_priority_updates(count, updates):
+    # Планировщик: приоритеты задач всё время меняются. update_key против delete + add
+    rng = random.Random(8)
+    keys = rng.sample(range(count * 4), count)
+    changes = []
+    live = list(keys)
+    taken = set(keys)
+    for _ in range(updates):
+        slot = rng.randrange(count)
+        new_key = rng.randrange(count * 4)
+        while new_key in taken:
+            new_key = rng.randrange(count * 4)
+        changes.append((live[slot], new_key))
+        taken.discard(live[slot])
+        taken.add(new_key)
+        live[slot] = new_key
+
+    print(f"priority updates: heap of {count:,}, {updates:,} key changes")
+    for name, engine in ENGINES.items():
+        timings = []
+        for use_update_key in (False, True):
+            heap = engine()
+            heap.bulk_add((key, "v") for key in keys)
+            start = time.perf_counter()
+            for old_key, new_key in changes:
+                if use_update_key:
+                    heap.update_key(old_key, new_key)
+                else:
+                    value = heap.search(old_key).value
+                    heap.delete(old_key)
+                    heap.add(new_key, value)
+            timings.append(updates / (time.perf_counter() - start))
+        print(f"{name:>6}: delete+add {timings[0]:10,.0f}/s, update_key {timings[1]:10,.0f}/s")
+
+
+def compare_print(count):
+    # print на большой куче: время и сколько памяти сверх самой кучи занимает печать
+    items = [(key, "v") for key in random.Random(9).sample(range(count * 4), count)]
+    print(f"print: heap of {count:,}")
+    with open(os.devnull, 'w', buffering=1 << 16) as devnull:
+        for name, engine in ENGINES.items():
+            heap = engine()
+            heap.bulk_add(items)
+            start = time.perf_counter()
+            heap.print_heap(output_stream=devnull)
+            elapsed = time.perf_counter() - start
+
+            tracemalloc.start()
+            heap.print_heap(output_stream=devnull)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(f"{name:>6}: {elapsed:.2f} s, {count / elapsed:10,.0f} entries/s, peak extra memory {peak / 1024:,.0f} KiB")
+
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    for size in (1_000, 10_000, 100_000, 1_000_000):
+        elapsed = interleaved_max(size, rounds)
+        print(f"heap of {size:>9,}: {rounds / elapsed:10,.0f} add+max+extract rounds/s ({elapsed:.2f} s)")
+
+    compare_engines(int(sys.argv[2]) if len(sys.argv) > 2 else 10_000_000)
+    compare_bulk(1_000_000)
+    compare_cli_batches(1_000_000)
+    compare_arities(1_000_000)
+    compare_priority_updates(1_000_000, 1_000_000)
+    compare_print(10_000_000)
+
+
+if __name__ == '__main__':
+    main()
@@ -2,8 +2,50 @@
 # Вместо принтов в методах search, min, max, extract теперь возвращается нода
 # Ну и вывод кучи в пользовательский поток
 
+import argparse
+import heapq
 import re
 import sys
+from array import array
+from collections import namedtuple
+from itertools import chain
+
+
+# Сколько родителей печатать за одну запись в поток: память на печать не зависит от размера кучи
+PRINT_CHUNK = 1024
+
+
+def write_heap_levels(output_stream, size, arity, root, format_children):
+    # Уровни кучи по строкам, у каждой вершины кроме корня - ключ родителя, недостающие места - "_".
+    # format_children(start, end) отдаёт через пробел вершины start..end-1, срезы режутся по границам
+    # родителей. Старая печать сбрасывала строку пачками по 1000 вершин с пробелом после каждой пачки,
+    # поэтому если на уровне ровно k * 1000 вершин, перед переводом строки (или перед " _") стоит
+    # лишний пробел - он сохранён, чтобы вывод не изменился
+    write = output_stream.write
+    if not size:
+        write("_\n")
+        return
+    write(root + "\n")
+
+    step = arity * PRINT_CHUNK
+    start, level_length = 1, arity
+    while start < size:
+        end = min(start + level_length, size)
+        for chunk_start in range(start, end, step):
+            if chunk_start != start:
+                write(" ")
+            write(format_children(chunk_start, min(chunk_start + step, end)))
+        count = end - start
+        if count % 1000 == 0:
+            write(" ")
+        missing = level_length - count
+        if missing:
+            blanks = " _" * min(missing, step)
+            for _ in range(missing // step):
+                write(blanks)
+            write(" _" * (missing % step))
+        write("\n")
+        start, level_length = end, level_length * arity
 
 
 class MinHeapError(Exception):
@@ -20,6 +62,10 @@ class MinHeap:
     def __init__(self):
         self.__heap = []
         self.__positions = {}
+        # Для max: куча из -key с ленивым удалением. Удалённые ключи остаются в ней, пока не всплывут
+        # наверх, и отбрасываются по __positions. Максимум min-кучи всегда лист, так что ответ тот же,
+        # что и у перебора листьев. Ключи должны быть числами
+        self.__max_keys = []
 
     def __swap(self, i, j):
         self.__positions[self.__heap[i].key], self.__positions[self.__heap[j].key] = j, i
@@ -57,14 +103,37 @@ class MinHeap:
         self.__positions[key] = len(self.__heap)
         self.__heap.append(node)
         self.__sift_up(len(self.__heap) - 1)
+        self.__push_max_key(key)
+
+    def __push_max_key(self, key):
+        heapq.heappush(self.__max_keys, -key)
+        if len(self.__max_keys) > 2 * len(self.__heap) + 16:
+            # Устаревших записей больше, чем живых: пересобираем, чтобы куча не росла без конца
+            self.__max_keys = [-key for key in self.__positions]
+            heapq.heapify(self.__max_keys)
 
     def set(self, key, value):
         if key not in self.__positions:
             raise MinHeapError("Element with this key was not found")
-        index = self.__positions[key]
-        self.__heap[index].value = value
-        self.__sift_up(index)
-        self.__sift_down(index)
+        # Меняется только значение, ключ и место в куче те же - просеивать нечего
+        self.__heap[self.__positions[key]].value = value
+
+    def update_key(self, old_key, new_key):
+        # Меняет приоритет: уменьшенный ключ может только подняться, увеличенный - только опуститься
+        if old_key not in self.__positions:
+            raise MinHeapError("Element with this key was not found")
+        if new_key == old_key:
+            return
+        if new_key in self.__positions:
+            raise MinHeapError("Element with this key already exists")
+        index = self.__positions.pop(old_key)
+        self.__heap[index].key = new_key
+        self.__positions[new_key] = index
+        if new_key < old_key:
+            self.__sift_up(index)
+        else:
+            self.__sift_down(index)
+        self.__push_max_key(new_key)
 
     def delete(self, key):
         if key not in self.__positions:
@@ -98,8 +167,10 @@ class MinHeap:
     def max(self):
         if not self.__heap:
             raise MinHeapError("Heap is empty")
-        first_leaf = len(self.__heap) // 2
-        return max(self.__heap[first_leaf:], key=lambda x: x.key)
+        max_keys = self.__max_keys
+        while -max_keys[0] not in self.__positions:
+            heapq.heappop(max_keys)
+        return self.__heap[self.__positions[-max_keys[0]]]
 
     def extract(self):
         if not self.__heap:
@@ -108,92 +179,411 @@ class MinHeap:
         self.delete(root.key)
         return root
 
+    def __len__(self):
+        return len(self.__heap)
+
+    def __check_new_keys(self, keys):
+        if len(set(keys)) != len(keys) or any(key in self.__positions for key in keys):
+            raise MinHeapError("Element with this key already exists")
+
+    def __push_max_keys(self, keys):
+        if len(keys) > len(self.__max_keys):
+            self.__max_keys.extend(-key for key in keys)
+            heapq.heapify(self.__max_keys)
+        else:
+            for key in keys:
+                heapq.heappush(self.__max_keys, -key)
+
+    def __heapify(self):
+        # Флойд: просеиваем вниз все внутренние вершины снизу вверх, позиции пишем потом одним проходом
+        heap = self.__heap
+        n = len(heap)
+        for index in range(n // 2 - 1, -1, -1):
+            node = heap[index]
+            while True:
+                child = 2 * index + 1
+                if child >= n:
+                    break
+                if child + 1 < n and heap[child + 1].key < heap[child].key:
+                    child += 1
+                if heap[child].key >= node.key:
+                    break
+                heap[index] = heap[child]
+                index = child
+            heap[index] = node
+        self.__positions = {node.key: index for index, node in enumerate(heap)}
+
+    def bulk_add(self, items, keep_layout=False):
+        # Добавляет все пары (key, value) или ни одной. В пустую кучу или пачкой не меньше кучи -
+        # кучей Флойда за O(n), раскладка при этом другая, чем от add по одному. keep_layout=True
+        # даёт ту же раскладку, что и add по одному, просто без лишних проверок на каждый ключ
+        nodes = [Node(key, value) for key, value in items]
+        keys = [node.key for node in nodes]
+        self.__check_new_keys(keys)
+
+        if not keep_layout and len(nodes) >= len(self.__heap):
+            self.__heap.extend(nodes)
+            self.__heapify()
+        else:
+            heap, positions = self.__heap, self.__positions
+            for node in nodes:
+                positions[node.key] = len(heap)
+                heap.append(node)
+                self.__sift_up(len(heap) - 1)
+        self.__push_max_keys(keys)
+
+    def extract_many(self, count):
+        # count наименьших по возрастанию, ровно как count вызовов extract, или ошибка без изменений
+        if count > len(self.__heap):
+            raise MinHeapError("Heap has fewer elements than requested")
+        heap, positions = self.__heap, self.__positions
+        result = []
+        for _ in range(count):
+            root = heap[0]
+            del positions[root.key]
+            last_node = heap.pop()
+            if heap:
+                heap[0] = last_node
+                positions[last_node.key] = 0
+                self.__sift_down(0)
+            result.append(root)
+        return result
+
+    def __format_children(self, start, end):
+        # start - 1 делится на 2, так что каждый родитель из среза повторяется ровно для двух детей
+        heap = self.__heap
+        parents = heap[(start - 1) // 2:(end - 2) // 2 + 1]
+        return " ".join([f"[{node.key} {node.value} {parent.key}]"
+                         for node, parent in zip(heap[start:end], chain.from_iterable(zip(parents, parents)))])
+
     def print_heap(self, output_stream=sys.stdout):
-        if not self.__heap:
-            print("_", file=output_stream)
-            return
+        heap = self.__heap
+        root = f"[{heap[0].key} {heap[0].value}]" if heap else None
+        write_heap_levels(output_stream, len(heap), 2, root, self.__format_children)
+
+
+# То, что возвращают search/min/max/extract у ArrayMinHeap: объектов Node там нет
+HeapItem = namedtuple('HeapItem', ['key', 'value'])
+
+
+class ArrayMinHeap:
+    # Та же куча, что MinHeap (те же индексы и тот же вывод), но без Node: ключи лежат в array('q'),
+    # значения - в параллельном списке. При просеивании элемент не меняется местами с соседями,
+    # а держится в локальных переменных, пока дырка идёт по уровням; каждый сдвинутый элемент
+    # получает новую позицию в __positions один раз. Ключи должны помещаться в 64 бита.
+    # arity > 2 делает кучу d-ичной: дерево ниже, sift_down проходит меньше уровней, но на каждом
+    # ищет минимум из d детей. Индексы и print тогда, конечно, не совпадают с двоичной кучей
+    def __init__(self, arity=2):
+        if arity < 2:
+            raise MinHeapError("Arity must be at least 2")
+        self.__arity = arity
+        self.__keys = array('q')
+        self.__values = []
+        self.__positions = {}
+        self.__max_keys = []
+        if arity != 2:
+            self.__sift_down = self.__sift_down_wide
+
+    def __sift_up(self, index, key, value):
+        # Ставит (key, value) в дырку index, поднимая её, пока родитель больше
+        keys, values, positions = self.__keys, self.__values, self.__positions
+        arity = self.__arity
+        while index > 0:
+            parent = (index - 1) // arity
+            parent_key = keys[parent]
+            if key >= parent_key:
+                break
+            keys[index] = parent_key
+            values[index] = values[parent]
+            positions[parent_key] = index
+            index = parent
+        keys[index] = key
+        values[index] = value
+        positions[key] = index
+        return index
+
+    def __sift_down(self, index, key, value):
+        keys, values, positions = self.__keys, self.__values, self.__positions
+        n = len(keys)
+        while True:
+            child = 2 * index + 1
+            if child >= n:
+                break
+            child_key = keys[child]
+            if child + 1 < n and keys[child + 1] < child_key:
+                child += 1
+                child_key = keys[child]
+            if child_key >= key:
+                break
+            keys[index] = child_key
+            values[index] = values[child]
+            positions[child_key] = index
+            index = child
+        keys[index] = key
+        values[index] = value
+        positions[key] = index
+
+    def __sift_down_wide(self, index, key, value):
+        # d-ичный вариант: минимальный ребёнок ищется проходом по d детям (на d = 4..8 это быстрее,
+        # чем min() по срезу: срез массива - это новый объект)
+        keys, values, positions = self.__keys, self.__values, self.__positions
+        arity = self.__arity
+        n = len(keys)
+        while True:
+            first = arity * index + 1
+            if first >= n:
+                break
+            child = first
+            child_key = keys[first]
+            for other in range(first + 1, min(first + arity, n)):
+                other_key = keys[other]
+                if other_key < child_key:
+                    child = other
+                    child_key = other_key
+            if child_key >= key:
+                break
+            keys[index] = child_key
+            values[index] = values[child]
+            positions[child_key] = index
+            index = child
+        keys[index] = key
+        values[index] = value
+        positions[key] = index
+
+    def __place(self, index, key, value):
+        # Как sift_up + sift_down у MinHeap: если подниматься некуда, элемент опускается
+        if self.__sift_up(index, key, value) == index:
+            self.__sift_down(index, key, value)
+
+    def add(self, key, value):
+        if key in self.__positions:
+            raise MinHeapError("Element with this key already exists")
+        try:
+            self.__keys.append(key)
+        except OverflowError:
+            raise MinHeapError("Key does not fit in 64 bits")
+        self.__values.append(value)
+        self.__sift_up(len(self.__keys) - 1, key, value)
+        self.__push_max_key(key)
+
+    def __push_max_key(self, key):
+        heapq.heappush(self.__max_keys, -key)
+        if len(self.__max_keys) > 2 * len(self.__keys) + 16:
+            self.__max_keys = [-key for key in self.__positions]
+            heapq.heapify(self.__max_keys)
+
+    def set(self, key, value):
+        if key not in self.__positions:
+            raise MinHeapError("Element with this key was not found")
+        # Ключ не меняется, значит и место в куче тоже
+        self.__values[self.__positions[key]] = value
 
-        print(f"[{self.__heap[0].key} {self.__heap[0].value}]", file=output_stream)
+    def update_key(self, old_key, new_key):
+        if old_key not in self.__positions:
+            raise MinHeapError("Element with this key was not found")
+        if new_key == old_key:
+            return
+        if new_key in self.__positions:
+            raise MinHeapError("Element with this key already exists")
+        index = self.__positions[old_key]
+        try:
+            # Проверка, что ключ влезает в массив, до того как что-то сдвинется; значение перезапишет sift
+            self.__keys[index] = new_key
+        except OverflowError:
+            raise MinHeapError("Key does not fit in 64 bits")
+        del self.__positions[old_key]
+        if new_key < old_key:
+            self.__sift_up(index, new_key, self.__values[index])
+        else:
+            self.__sift_down(index, new_key, self.__values[index])
+        self.__push_max_key(new_key)
 
-        it = iter(self.__heap)
-        next(it)
+    def delete(self, key):
+        if key not in self.__positions:
+            raise MinHeapError("Element with this key was not found")
+        index = self.__positions.pop(key)
+        last_key = self.__keys.pop()
+        last_value = self.__values.pop()
+        if index < len(self.__keys):
+            self.__place(index, last_key, last_value)
 
-        level_length = 2
-        count = 0
-        join_buffer_count = 0
-        line = []
+    def get_index(self, key):
+        return self.__positions.get(key)
 
-        for vertex in it:
-            join_buffer_count += 1
-            count += 1
+    def search(self, key):
+        index = self.__positions.get(key)
+        if index is None:
+            return None
+        return HeapItem(key, self.__values[index])
 
-            parent_index = (self.__positions[vertex.key] - 1) // 2
-            line.append(f"[{vertex.key} {vertex.value} {self.__heap[parent_index].key}]")
+    def min(self):
+        if not self.__keys:
+            raise MinHeapError("Heap is empty")
+        return HeapItem(self.__keys[0], self.__values[0])
 
-            if join_buffer_count == 1000:
-                print(" ".join(line), end=" ", file=output_stream)
-                join_buffer_count = 0
-                line = []
+    def max(self):
+        if not self.__keys:
+            raise MinHeapError("Heap is empty")
+        max_keys = self.__max_keys
+        while -max_keys[0] not in self.__positions:
+            heapq.heappop(max_keys)
+        key = -max_keys[0]
+        return HeapItem(key, self.__values[self.__positions[key]])
 
-            if count == level_length:
-                print(" ".join(line), file=output_stream)
-                join_buffer_count = 0
-                line = []
-                level_length *= 2
-                count = 0
+    def extract(self):
+        if not self.__keys:
+            raise MinHeapError("Heap is empty")
+        root = HeapItem(self.__keys[0], self.__values[0])
+        self.delete(root.key)
+        return root
 
-        if count != 0:
-            print(" ".join(line), end="", file=output_stream)
-            print(" _" * (level_length - count), file=output_stream)
+    def __len__(self):
+        return len(self.__keys)
+
+    def __heapify(self):
+        # Флойд с дыркой, как в __sift_down, но без __positions: их пишем одним проходом в конце
+        keys, values = self.__keys, self.__values
+        arity = self.__arity
+        n = len(keys)
+        for index in range((n - 2) // arity, -1, -1):
+            key, value = keys[index], values[index]
+            while True:
+                first = arity * index + 1
+                if first >= n:
+                    break
+                child = first
+                child_key = keys[first]
+                for other in range(first + 1, min(first + arity, n)):
+                    other_key = keys[other]
+                    if other_key < child_key:
+                        child = other
+                        child_key = other_key
+                if child_key >= key:
+                    break
+                keys[index] = child_key
+                values[index] = values[child]
+                index = child
+            keys[index] = key
+            values[index] = value
+        self.__positions = dict(zip(keys, range(n)))
+
+    def bulk_add(self, items, keep_layout=False):
+        # То же, что MinHeap.bulk_add
+        pairs = list(items)
+        try:
+            new_keys = array('q', [key for key, _ in pairs])
+        except OverflowError:
+            raise MinHeapError("Key does not fit in 64 bits")
+        if len(set(new_keys)) != len(new_keys) or any(key in self.__positions for key in new_keys):
+            raise MinHeapError("Element with this key already exists")
 
+        if not keep_layout and len(pairs) >= len(self.__keys):
+            self.__keys.extend(new_keys)
+            self.__values.extend(value for _, value in pairs)
+            self.__heapify()
+        else:
+            keys, values = self.__keys, self.__values
+            for key, value in pairs:
+                keys.append(key)
+                values.append(value)
+                self.__sift_up(len(keys) - 1, key, value)
+
+        if len(pairs) > len(self.__max_keys):
+            self.__max_keys.extend(-key for key in new_keys)
+            heapq.heapify(self.__max_keys)
+        else:
+            for key in new_keys:
+                heapq.heappush(self.__max_keys, -key)
+
+    def extract_many(self, count):
+        if count > len(self.__keys):
+            raise MinHeapError("Heap has fewer elements than requested")
+        keys, values, positions = self.__keys, self.__values, self.__positions
+        result = []
+        for _ in range(count):
+            result.append(HeapItem(keys[0], values[0]))
+            del positions[keys[0]]
+            last_key = keys.pop()
+            last_value = values.pop()
+            if keys:
+                self.__sift_down(0, last_key, last_value)
+        return result
+
+    def __format_children(self, start, end):
+        # start - 1 делится на arity, так что каждый родитель из среза повторяется ровно для arity детей
+        keys, arity = self.__keys, self.__arity
+        parents = keys[(start - 1) // arity:(end - 2) // arity + 1]
+        return " ".join([f"[{key} {value} {parent}]" for key, value, parent
+                         in zip(keys[start:end], self.__values[start:end], chain.from_iterable(zip(*[parents] * arity)))])
 
-def main():
-    output_stream = sys.stdout
-    min_heap = MinHeap()
-    command_patterns = [
-        re.compile(r'^add ([-+]?\d+) (\S*)$'),
-        re.compile(r'^set ([-+]?\d+) (\S*)$'),
-        re.compile(r'^delete ([-+]?\d+)$'),
-        re.compile(r'^search ([-+]?\d+)$'),
-        re.compile(r'^min$'),
-        re.compile(r'^max$'),
-        re.compile(r'^extract$'),
-        re.compile(r'^print$'),
-    ]
-
-    for line in sys.stdin:
+    def print_heap(self, output_stream=sys.stdout):
+        keys = self.__keys
+        root = f"[{keys[0]} {self.__values[0]}]" if keys else None
+        write_heap_levels(output_stream, len(keys), self.__arity, root, self.__format_children)
+
+
+ENGINES = {
+    'node': MinHeap,
+    'array': ArrayMinHeap,
+}
+
+
+COMMAND_PATTERNS = [
+    ('add', re.compile(r'^add ([-+]?\d+) (\S*)$')),
+    ('set', re.compile(r'^set ([-+]?\d+) (\S*)$')),
+    ('delete', re.compile(r'^delete ([-+]?\d+)$')),
+    ('search', re.compile(r'^search ([-+]?\d+)$')),
+    ('min', re.compile(r'^min$')),
+    ('max', re.compile(r'^max$')),
+    ('extract', re.compile(r'^extract$')),
+    ('print', re.compile(r'^print$')),
+]
+
+
+def match_command(line):
+    for name, pattern in COMMAND_PATTERNS:
+        match = pattern.match(line)
+        if match:
+            return name, match
+    return None, None
+
+
+def execute(min_heap, name, match, output_stream):
+    if name == "add":
+        min_heap.add(int(match.group(1)), str(match.group(2)))
+    elif name == "set":
+        min_heap.set(int(match.group(1)), str(match.group(2)))
+    elif name == "delete":
+        min_heap.delete(int(match.group(1)))
+    elif name == "search":
+        node = min_heap.search(int(match.group(1)))
+        if node:
+            index = min_heap.get_index(node.key)
+            print(f"1 {index} {node.value}", file=output_stream)
+        else:
+            print("0", file=output_stream)
+    elif name == "min":
+        min_node = min_heap.min()
+        print(f"{min_node.key} 0 {min_node.value}", file=output_stream)
+    elif name == "max":
+        max_node = min_heap.max()
+        index = min_heap.get_index(max_node.key)
+        print(f"{max_node.key} {index} {max_node.value}", file=output_stream)
+    elif name == "extract":
+        node = min_heap.extract()
+        print(f"{node.key} {node.value}", file=output_stream)
+    elif name == "print":
+        min_heap.print_heap(output_stream=output_stream)
+
+
+def run_lines(min_heap, input_stream, output_stream):
+    for line in input_stream:
         if not line or line == "\n":
             continue
         try:
-            for pattern in command_patterns:
-                match = pattern.match(line)
-                if match:
-                    if line.startswith("add"):
-                        min_heap.add(int(match.group(1)), str(match.group(2)))
-                    elif line.startswith("set"):
-                        min_heap.set(int(match.group(1)), str(match.group(2)))
-                    elif line.startswith("delete"):
-                        min_heap.delete(int(match.group(1)))
-                    elif line.startswith("search"):
-                        node = min_heap.search(int(match.group(1)))
-                        if node:
-                            index = min_heap.get_index(node.key)
-                            print(f"1 {index} {node.value}", file=output_stream)
-                        else:
-                            print("0", file=output_stream)
-                    elif line.startswith("min"):
-                        min_node = min_heap.min()
-                        print(f"{min_node.key} 0 {min_node.value}", file=output_stream)
-                    elif line.startswith("max"):
-                        max_node = min_heap.max()
-                        index = min_heap.get_index(max_node.key)
-                        print(f"{max_node.key} {index} {max_node.value}", file=output_stream)
-                    elif line.startswith("extract"):
-                        node = min_heap.extract()
-                        print(f"{node.key} {node.value}", file=output_stream)
-                    elif line.startswith("print"):
-                        min_heap.print_heap(output_stream=output_stream)
-                    break
+            name, match = match_command(line)
+            if name:
+                execute(min_heap, name, match, output_stream)
             else:
                 print("error", file=output_stream)
         except MinHeapError as ex:
@@ -201,5 +591,78 @@ def main():
             print("error", file=output_stream)  # Чтобы реализация ошибок не была заточена под вывод
 
 
+def run_batched(min_heap, input_stream, output_stream):
+    # Подряд идущие add копятся и уходят в bulk_add с той же раскладкой, что и add по одному
+    # (куча Флойда поменяла бы индексы в выводе), подряд идущие extract - в один extract_many
+    adds = []
+    extracts = 0
+
+    def flush():
+        nonlocal adds, extracts
+        if adds:
+            try:
+                min_heap.bulk_add(adds, keep_layout=True)
+            except MinHeapError:
+                # Пачка не добавилась целиком - повторяем по одному, чтобы ошибки встали на свои строки
+                for key, value in adds:
+                    try:
+                        min_heap.add(key, value)
+                    except MinHeapError:
+                        print("error", file=output_stream)
+            adds = []
+        if extracts:
+            count = min(extracts, len(min_heap))
+            lines = [f"{node.key} {node.value}\n" for node in min_heap.extract_many(count)]
+            lines.extend(["error\n"] * (extracts - count))
+            output_stream.write("".join(lines))
+            extracts = 0
+
+    try:
+        for line in input_stream:
+            if not line or line == "\n":
+                continue
+            name, match = match_command(line)
+            if name == "add":
+                if extracts:
+                    flush()
+                adds.append((int(match.group(1)), str(match.group(2))))
+                continue
+            if name == "extract":
+                if adds:
+                    flush()
+                extracts += 1
+                continue
+
+            flush()
+            try:
+                if name:
+                    execute(min_heap, name, match, output_stream)
+                else:
+                    print("error", file=output_stream)
+            except MinHeapError:
+                print("error", file=output_stream)
+    finally:
+        # Старый цикл падает на ключах длиннее 4300 цифр, успев выполнить всё до них, - так же и здесь
+        flush()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--engine', choices=ENGINES, default='node')
+    parser.add_argument('--batch', action='store_true', help='run consecutive add/extract commands as batches')
+    parser.add_argument('--arity', type=int, default=2, help='children per node for the array engine')
+    args = parser.parse_args()
+    if args.arity < 2:
+        parser.error("--arity must be at least 2")
+    if args.arity != 2 and args.engine != 'array':
+        parser.error("--arity is only available for the array engine")
+
+    min_heap = ArrayMinHeap(arity=args.arity) if args.engine == 'array' else ENGINES[args.engine]()
+    if args.batch:
+        run_batched(min_heap, sys.stdin, sys.stdout)
+    else:
+        run_lines(min_heap, sys.stdin, sys.stdout)
+
+
 if __name__ == "__main__":
     main()
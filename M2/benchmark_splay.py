@@ -0,0 +1,133 @@
+import argparse
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+# Прогоняет одни и те же файлы команд через старые версии (замороженные копии в legacy/)
+# и через CLI на общем ядре splay_core.py, печатает ops/s и пиковый RSS каждого процесса
+# и сверяет вывод нового CLI со старым
+
+M2_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+
+# (имя, скрипт, с чьим выводом сравнивать)
+SCRIPTS = [
+    ('legacy ejudge', os.path.join(M2_DIRECTORY, 'legacy', 'ejudge_2_1_splay.py'), None),
+    ('core ejudge', os.path.join(M2_DIRECTORY, 'Ejudge-2-1', 'main.py'), 'legacy ejudge'),
+    ('legacy alternative', os.path.join(M2_DIRECTORY, 'legacy', 'alternative_a_splay.py'), None),
+    ('core alternative', os.path.join(M2_DIRECTORY, 'Alternative', 'a-splay.py'), 'legacy alternative'),
+]
+
+# Доли команд add, set, delete, search, min, max, print и диапазон ключей. Печать дерева
+# выводит все уровни целиком, поэтому в профиле с print ключей мало и дерево неглубокое
+PROFILES = {
+    'mixed': ((40, 10, 15, 25, 5, 5, 0), 1 << 20),
+    'print': ((35, 10, 15, 20, 5, 5, 10), 12),
+}
+COMMANDS = ('add', 'set', 'delete', 'search', 'min', 'max', 'print')
+
+# Скрипт запускается через эту обёртку: ru_maxrss в Linux переживает fork и exec и показывает память
+# самого бенчмарка, а VmHWM из /proc/self/status считается заново для каждой программы
+RUNNER = """
+import atexit, os, runpy, sys
+
+script, report_path = sys.argv[1:3]
+
+def report_peak_rss():
+    with open('/proc/self/status') as status, open(report_path, 'w') as report:
+        report.write(next(line for line in status if line.startswith('VmHWM:')).split()[1])
+
+atexit.register(report_peak_rss)
+sys.argv = [script]
+sys.path[0] = os.path.dirname(script)
+runpy.run_path(script, run_name='__main__')
+"""
+
+
+def generate_commands(path, profile, count, seed=0):
+    rng = random.Random(seed)
+    weights, key_range = PROFILES[profile]
+    lines = []
+    for command in rng.choices(COMMANDS, weights, k=count):
+        if command in ('add', 'set'):
+            lines.append(f"{command} {rng.randint(-key_range, key_range)} v{rng.randrange(1000)}\n")
+        elif command in ('delete', 'search'):
+            lines.append(f"{command} {rng.randint(-key_range, key_range)}\n")
+        else:
+            lines.append(command + "\n")
+    with open(path, 'w') as commands_file:
+        commands_file.writelines(lines)
+
+
+def replay(script, commands_path, output_path):
+    report_path = output_path + '.rss'
+    with open(commands_path, 'rb') as input_file, open(output_path, 'wb') as output_file:
+        start = time.perf_counter()
+        process = subprocess.run([sys.executable, '-c', RUNNER, script, report_path],
+                                 stdin=input_file, stdout=output_file)
+        elapsed = time.perf_counter() - start
+    with open(report_path) as report:
+        peak_rss = int(report.read())  # в килобайтах
+    return elapsed, peak_rss, process.returncode
+
+
+def same_files(first_path, second_path):
+    with open(first_path, 'rb') as first, open(second_path, 'rb') as second:
+        while True:
+            first_block = first.read(1 << 20)
+            if first_block != second.read(1 << 20):
+                return False
+            if not first_block:
+                return True
+
+
+def run_file(commands_path, directory):
+    with open(commands_path, 'rb') as commands_file:
+        count = sum(1 for _ in commands_file)
+    print(f"{os.path.basename(commands_path)}: {count:,} commands")
+
+    outputs = {}
+    regressions = 0
+    for name, script, reference in SCRIPTS:
+        output_path = os.path.join(directory, name.replace(' ', '_') + '.out')
+        elapsed, peak_rss, returncode = replay(script, commands_path, output_path)
+        outputs[name] = output_path
+        status = ""
+        if returncode:
+            status = f" exit code {returncode}"
+            regressions += 1
+        elif reference and not same_files(outputs[reference], output_path):
+            status = f" OUTPUT DIFFERS from {reference}"
+            regressions += 1
+        print(f"{name:>20}: {count / elapsed:10,.0f} ops/s ({elapsed:.2f} s), peak RSS {peak_rss / 1024:7.1f} MiB{status}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('commands_files', nargs='*', help='replay these files instead of generated ones')
+    parser.add_argument('--count', type=int, default=200_000, help='commands per generated file')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    regressions = 0
+    with tempfile.TemporaryDirectory() as directory:
+        commands_files = args.commands_files
+        if not commands_files:
+            commands_files = []
+            for profile in PROFILES:
+                path = os.path.join(directory, f"{profile}.txt")
+                generate_commands(path, profile, args.count, args.seed)
+                commands_files.append(path)
+        for commands_path in commands_files:
+            regressions += run_file(commands_path, directory)
+
+    if regressions:
+        print(f"{regressions} regression(s)")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
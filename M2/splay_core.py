@@ -0,0 +1,1039 @@
+# Общее ядро splay-дерева для M2/Ejudge-2-1 и M2/Alternative/a-splay.py
+# Сделал вывод "error" в методах дерева через исключения
+# Вместо принтов в методах search, min, max теперь возвращается нода
+# Ну и вывод дерева в пользовательский поток
+
+import gc
+import mmap
+import os
+import struct
+import sys
+import threading
+from array import array
+from collections import Counter, defaultdict, namedtuple
+
+
+# from memory_profiler import profile
+
+class SplayTreeError(Exception):
+    pass
+
+
+class Node:
+    __slots__ = ('key', 'value', 'left', 'right', 'parent')
+
+    def __init__(self, key, value, parent=None):
+        self.key = key
+        self.value = value
+        self.left = None
+        self.right = None
+        self.parent = parent
+
+
+class SizedNode(Node):
+    # Вершина с размером поддерева, нужна только для count() за O(log n)
+    __slots__ = ('size',)
+
+    def __init__(self, key, value, parent=None):
+        super().__init__(key, value, parent)
+        self.size = 1
+
+
+def subtree_size(node):
+    return node.size if node else 0
+
+
+# Снимок SplayTree: заголовок (сигнатура, версия, число вершин), затем вершины в прямом порядке:
+# ключ int64, флаги детей (1 - есть левый, 2 - есть правый), длина значения uint32 и само значение в UTF-8
+SNAPSHOT_MAGIC = b'SPLY'
+SNAPSHOT_VERSION = 1
+SNAPSHOT_HEADER = struct.Struct('<4sBq')
+SNAPSHOT_NODE = struct.Struct('<qBI')
+SNAPSHOT_LEFT = 1
+SNAPSHOT_RIGHT = 2
+SNAPSHOT_WRITE_SIZE = 1 << 20
+
+
+class SplayTree:
+    # Операции, которые учитывает статистика
+    COUNTED_OPERATIONS = ('add', 'set', 'delete', 'search', 'min', 'max', 'count')
+
+    def __init__(self, track_sizes=False, stats=False):
+        self.__root = None
+        # Размеры поддеревьев поддерживаются только по запросу: без них вершины меньше, а повороты дешевле
+        self.__sizes = track_sizes
+        self.__node = SizedNode if track_sizes else Node
+        self.__stats = None
+        if stats:
+            self.__enable_stats()
+
+    def __enable_stats(self):
+        # Счётчики подключаются подменой методов у самого экземпляра, так что дерево без stats
+        # выполняет ровно тот же код, что и раньше, без единой лишней проверки
+        self.__stats = {
+            'operations': Counter(),
+            'splays': 0,
+            'rotations': 0,
+            'zig': 0,
+            'zig_zig': 0,
+            'zig_zag': 0,
+            'max_depth': 0,
+            'depth_histogram': defaultdict(Counter),
+        }
+        self.__operation = None
+        self.__splay = self.__counted_splay
+        for name in self.COUNTED_OPERATIONS:
+            setattr(self, name, self.__counted_operation(name, getattr(self, name)))
+        self.range = self.__counted_range(self.range)
+
+    def __counted_operation(self, name, method):
+        def counted(*args):
+            # Вложенные вызовы (count -> range) записываются на внешнюю операцию
+            outer = self.__operation
+            if outer is None:
+                self.__stats['operations'][name] += 1
+                self.__operation = name
+            try:
+                return method(*args)
+            finally:
+                self.__operation = outer
+        return counted
+
+    def __counted_range(self, method):
+        def counted(lo, hi):
+            # range сплеит только при первом next(), его и относим к range
+            nodes = method(lo, hi)
+            outer = self.__operation
+            if outer is None:
+                self.__stats['operations']['range'] += 1
+                self.__operation = 'range'
+            try:
+                first = next(nodes, None)
+            finally:
+                self.__operation = outer
+            if first is not None:
+                yield first
+                yield from nodes
+        return counted
+
+    def __counted_splay(self, node):
+        # Снизу вверх сплей съедает путь до корня по два ребра: одинаковые направления - zig-zig,
+        # разные - zig-zag, одно оставшееся ребро - zig. Поэтому шаги считаются по пути заранее,
+        # а сами повороты делает обычный __splay
+        directions = []
+        child = node
+        while child.parent:
+            directions.append(child is child.parent.left)
+            child = child.parent
+        depth = len(directions)
+        zig_zig = sum(1 for i in range(0, depth - 1, 2) if directions[i] == directions[i + 1])
+
+        stats = self.__stats
+        stats['splays'] += 1
+        stats['rotations'] += depth
+        stats['zig'] += depth % 2
+        stats['zig_zig'] += zig_zig
+        stats['zig_zag'] += depth // 2 - zig_zig
+        stats['max_depth'] = max(stats['max_depth'], depth)
+        stats['depth_histogram'][self.__operation or 'other'][depth] += 1
+        SplayTree.__splay(self, node)
+
+    def stats(self):
+        if self.__stats is None:
+            raise SplayTreeError("Stats are not enabled")
+        stats = dict(self.__stats)
+        stats['operations'] = dict(stats['operations'])
+        stats['depth_histogram'] = {operation: dict(sorted(histogram.items()))
+                                    for operation, histogram in stats['depth_histogram'].items()}
+        operations = sum(stats['operations'].values())
+        stats['rotations_per_operation'] = stats['rotations'] / operations if operations else 0.0
+        return stats
+
+    def __rotate_left(self, x):
+        y = x.right
+        x.right = y.left
+        if y.left:
+            y.left.parent = x
+        y.parent = x.parent
+        if x.parent is None:
+            self.__root = y
+        elif x == x.parent.left:
+            x.parent.left = y
+        else:
+            x.parent.right = y
+        y.left = x
+        x.parent = y
+        if self.__sizes:
+            y.size = x.size
+            x.size = 1 + subtree_size(x.left) + subtree_size(x.right)
+
+    def __rotate_right(self, x):
+        y = x.left
+        x.left = y.right
+        if y.right:
+            y.right.parent = x
+        y.parent = x.parent
+        if x.parent is None:
+            self.__root = y
+        elif x == x.parent.right:
+            x.parent.right = y
+        else:
+            x.parent.left = y
+        y.right = x
+        x.parent = y
+        if self.__sizes:
+            y.size = x.size
+            x.size = 1 + subtree_size(x.left) + subtree_size(x.right)
+
+    def __splay(self, node):
+        while node.parent:
+            # Zig
+            if node.parent.parent is None:
+                if node == node.parent.left:
+                    self.__rotate_right(node.parent)
+                else:
+                    self.__rotate_left(node.parent)
+            # Zig-Zig
+            elif node == node.parent.left and node.parent == node.parent.parent.left:
+                self.__rotate_right(node.parent.parent)
+                self.__rotate_right(node.parent)
+            elif node == node.parent.right and node.parent == node.parent.parent.right:
+                self.__rotate_left(node.parent.parent)
+                self.__rotate_left(node.parent)
+            # Zig-Zag
+            elif node == node.parent.right and node.parent == node.parent.parent.left:
+                self.__rotate_left(node.parent)
+                self.__rotate_right(node.parent)
+            elif node == node.parent.left and node.parent == node.parent.parent.right:
+                self.__rotate_right(node.parent)
+                self.__rotate_left(node.parent)
+        self.__root = node
+
+    def __grow_path(self, node):
+        # Новый лист: у всех его предков поддерево стало на одну вершину больше
+        if self.__sizes:
+            while node:
+                node.size += 1
+                node = node.parent
+
+    def add(self, key, value):
+        if not self.__root:
+            self.__root = self.__node(key, value)
+            return
+        node = self.__root
+        while True:
+            if key < node.key:
+                if node.left:
+                    node = node.left
+                else:
+                    node.left = self.__node(key, value, parent=node)
+                    self.__grow_path(node)
+                    self.__splay(node.left)
+                    break
+            elif key > node.key:
+                if node.right:
+                    node = node.right
+                else:
+                    node.right = self.__node(key, value, parent=node)
+                    self.__grow_path(node)
+                    self.__splay(node.right)
+                    break
+            else:
+                self.__splay(node)
+                raise SplayTreeError("Element with this key already exists")
+
+    def delete(self, key):
+        node_to_delete = self.__search(key)
+        if not node_to_delete:
+            raise SplayTreeError("Element with this key was not found")
+
+        if node_to_delete.left:
+            left_subtree = node_to_delete.left
+            left_subtree.parent = None
+
+            if node_to_delete.right:
+                right_subtree = node_to_delete.right
+
+                max_node = self.__max(left_subtree)
+
+                max_node.right = right_subtree
+                right_subtree.parent = max_node
+                if self.__sizes:
+                    max_node.size += right_subtree.size
+
+                self.__root = max_node
+            else:
+                self.__root = left_subtree
+        else:
+            self.__root = node_to_delete.right
+            if self.__root:
+                self.__root.parent = None
+
+    def __search(self, key):
+        node = self.__root
+        while node:
+            if key < node.key:
+                if node.left is None:
+                    self.__splay(node)
+                    break
+                node = node.left
+            elif key > node.key:
+                if node.right is None:
+                    self.__splay(node)
+                    break
+                node = node.right
+            else:
+                self.__splay(node)
+                return node
+        return None
+
+    def search(self, key):
+        node = self.__search(key)
+        if node:
+            return self.__root  # Хотел возвращать только значение, но исходя из требуемого функционала для min/max
+        else:                   # Скорее всего предполагается что тут тоже нужно возвращать ноду
+            return None
+
+    def peek(self, key):
+        # Поиск без сплея: дерево не меняется, но и не подстраивается под обращения
+        node = self.__root
+        while node:
+            if key < node.key:
+                node = node.left
+            elif key > node.key:
+                node = node.right
+            else:
+                return node
+        return None
+
+    def set(self, key, value):
+        node = self.__search(key)
+        if node:
+            self.__root.value = value
+        else:
+            raise SplayTreeError("Element with this key was not found")
+
+    def __min(self, node):
+        while node.left is not None:
+            node = node.left
+        self.__splay(node)
+        return node
+
+    def __max(self, node):
+        while node.right is not None:
+            node = node.right
+        self.__splay(node)
+        return node
+
+    def min(self):
+        if self.__root:
+            min_node = self.__min(self.__root)
+            return min_node
+        raise SplayTreeError("Splay tree is empty")
+
+    def max(self):
+        if self.__root:
+            max_node = self.__max(self.__root)
+            return max_node
+        raise SplayTreeError("Splay tree is empty")
+
+    def bulk_load(self, sorted_items):
+        # Строит сбалансированное дерево из пар (key, value) по возрастанию ключей за O(n) без сплеев
+        if self.__root:
+            raise SplayTreeError("Bulk load needs an empty tree")
+        items = list(sorted_items)
+        for i in range(1, len(items)):
+            if not items[i - 1][0] < items[i][0]:
+                raise SplayTreeError("Items must be sorted by key without duplicates")
+
+        def build(lo, hi, parent):
+            if lo >= hi:
+                return None
+            middle = (lo + hi) // 2
+            node = self.__node(items[middle][0], items[middle][1], parent)
+            node.left = build(lo, middle, node)
+            node.right = build(middle + 1, hi, node)
+            if self.__sizes:
+                node.size = hi - lo
+            return node
+
+        self.__root = build(0, len(items), None)
+
+    def range(self, lo, hi):
+        # Вершины с lo <= key < hi по возрастанию. Сплеится только lo, дальше идём по преемникам
+        # лениво, поэтому менять дерево, пока генератор не дочитан, нельзя
+        if not self.__root:
+            return
+        self.__search(lo)
+        node = self.__root
+        if node.key < lo:
+            node = self.__successor(node)
+        while node and node.key < hi:
+            yield node
+            node = self.__successor(node)
+
+    def count(self, lo, hi):
+        # Число ключей с lo <= key < hi: с размерами поддеревьев - разность рангов за O(log n),
+        # без них - обход range()
+        if lo >= hi or not self.__root:
+            return 0
+        if not self.__sizes:
+            return sum(1 for _ in self.range(lo, hi))
+        return self.__rank(hi) - self.__rank(lo)
+
+    @staticmethod
+    def __successor(node):
+        if node.right:
+            node = node.right
+            while node.left:
+                node = node.left
+            return node
+        while node.parent and node == node.parent.right:
+            node = node.parent
+        return node.parent
+
+    def __rank(self, key):
+        # Сколько ключей меньше key. Последнюю вершину спуска сплеим, как при обычном поиске
+        node = self.__root
+        rank = 0
+        while True:
+            if key <= node.key:
+                if node.left is None:
+                    break
+                node = node.left
+            else:
+                rank += subtree_size(node.left) + 1
+                if node.right is None:
+                    break
+                node = node.right
+        self.__splay(node)
+        return rank
+
+    def dump(self, path):
+        # Форма дерева сохраняется как есть, поэтому восстановленное дерево печатается так же
+        count = 0
+        parts = []
+        size = 0
+        stack = [self.__root] if self.__root else []
+        with open(path, 'wb') as snapshot:
+            snapshot.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, 0))
+            while stack:
+                node = stack.pop()
+                count += 1
+                if not isinstance(node.value, str):
+                    raise SplayTreeError("Only string values can be dumped")
+                value = node.value.encode('utf-8', 'surrogatepass')
+                flags = (SNAPSHOT_LEFT if node.left else 0) | (SNAPSHOT_RIGHT if node.right else 0)
+                try:
+                    parts.append(SNAPSHOT_NODE.pack(node.key, flags, len(value)))
+                except struct.error:
+                    raise SplayTreeError("Key does not fit in 64 bits")
+                parts.append(value)
+                size += SNAPSHOT_NODE.size + len(value)
+                if size >= SNAPSHOT_WRITE_SIZE:
+                    snapshot.write(b''.join(parts))
+                    parts = []
+                    size = 0
+                # Правое поддерево кладём первым, чтобы левое записалось раньше
+                if node.right:
+                    stack.append(node.right)
+                if node.left:
+                    stack.append(node.left)
+            snapshot.write(b''.join(parts))
+            # Число вершин известно только в конце
+            snapshot.seek(0)
+            snapshot.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, count))
+
+    def load(self, path):
+        # Заменяет содержимое дерева снимком из dump() за O(n), ничего не сплея
+        with open(path, 'rb') as snapshot:
+            # Пустой файл mmap не отображает
+            if os.fstat(snapshot.fileno()).st_size < SNAPSHOT_HEADER.size:
+                raise SplayTreeError("Corrupted snapshot")
+            # Загрузка создаёт только живые вершины, а сборщик циклов на миллионах новых объектов
+            # успевает пройтись по всей куче много раз, поэтому на время чтения он выключен
+            gc_enabled = gc.isenabled()
+            gc.disable()
+            try:
+                with mmap.mmap(snapshot.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                    root, nodes = self.__read_snapshot(data)
+            finally:
+                if gc_enabled:
+                    gc.enable()
+
+        if self.__sizes:
+            # В обратном прямом порядке дети идут раньше родителя
+            for node in reversed(nodes):
+                node.size = 1 + subtree_size(node.left) + subtree_size(node.right)
+        self.__root = root
+
+    def __read_snapshot(self, data):
+        magic, version, count = SNAPSHOT_HEADER.unpack_from(data)
+        if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+            raise SplayTreeError("Not a splay tree snapshot")
+
+        make_node = self.__node
+        node_size = SNAPSHOT_NODE.size
+        unpack_node = SNAPSHOT_NODE.unpack_from
+        nodes = [] if self.__sizes else None
+        root = None
+        # Места, куда встанут следующие вершины: (родитель, левый ли ребёнок)
+        slots = [(None, True)] if count else []
+        position = SNAPSHOT_HEADER.size
+        try:
+            for _ in range(count):
+                key, flags, length = unpack_node(data, position)
+                position += node_size
+                value = data[position:position + length].decode('utf-8', 'surrogatepass')
+                position += length
+
+                parent, is_left = slots.pop()
+                node = make_node(key, value, parent)
+                if parent is None:
+                    root = node
+                elif is_left:
+                    parent.left = node
+                else:
+                    parent.right = node
+                if flags & SNAPSHOT_RIGHT:
+                    slots.append((node, False))
+                if flags & SNAPSHOT_LEFT:
+                    slots.append((node, True))
+                if nodes is not None:
+                    nodes.append(node)
+        except (struct.error, IndexError, UnicodeDecodeError):
+            raise SplayTreeError("Corrupted snapshot")
+        if slots or position != len(data):
+            raise SplayTreeError("Corrupted snapshot")
+        return root, nodes
+
+    # @profile
+    def print_tree(self, output_stream=sys.stdout, empty_first_level=True):
+        # empty_first_level: печатать ли строку "_ _" под корнем без детей. Ejudge-2-1 её печатает,
+        # вариант из Alternative - нет
+        if not self.__root:
+            print("_", file=output_stream)
+            return
+
+        writer = LevelWriter(output_stream)
+        writer.write(f"[{self.__root.key} {self.__root.value}]\n")
+
+        # Храним только настоящие вершины уровня вместе с их номером в уровне,
+        # пустые места печатаются сразу целыми кусками "_"
+        level = []
+        if self.__root.left:
+            level.append((0, self.__root.left))
+        if self.__root.right:
+            level.append((1, self.__root.right))
+        level_length = 2
+        if not level and not empty_first_level:
+            writer.flush()
+            return
+
+        while True:
+            previous = -1
+            next_level = []
+            for index, node in level:
+                writer.write_gaps(index - previous - 1)
+                writer.write_token(f"[{node.key} {node.value} {node.parent.key}]")
+                if node.left:
+                    next_level.append((2 * index, node.left))
+                if node.right:
+                    next_level.append((2 * index + 1, node.right))
+                previous = index
+            writer.write_gaps(level_length - previous - 1)
+            writer.end_line()
+
+            if not next_level:
+                break
+            level = next_level
+            level_length *= 2
+
+        writer.flush()
+
+
+# То, что возвращают search/min/max у PooledSplayTree: вершин-объектов там нет
+SplayItem = namedtuple('SplayItem', ['key', 'value'])
+
+
+class PooledSplayTree:
+    # Вершины - это номера в параллельных массивах keys/left/right (array('q')) и списке values.
+    # Удалённые номера идут в free и переиспользуются. На ключ уходит 24 байта массивов и 8 байт ссылки
+    # на значение (~33 против ~112 у Node с __dict__ и ~72 у Node со __slots__). Каждое чтение из array
+    # создаёт новый int, так что сплей снизу вверх с массивом родителей (~10 чтений на поворот)
+    # проигрывает дереву на вершинах-объектах. Поэтому здесь однопроходный сплей сверху вниз, как у
+    # TopDownSplayTree: на уровень 2-4 чтения и родители не нужны. Форма дерева - как у TopDownSplayTree,
+    # а не как у SplayTree, так что print у этого движка печатает его собственное дерево. Ключи должны
+    # помещаться в 64 бита.
+    NIL = -1
+
+    def __init__(self):
+        self.__root = self.NIL
+        self.__keys = array('q')
+        self.__values = []
+        self.__left = array('q')
+        self.__right = array('q')
+        self.__free = []
+
+    def __new_node(self, key, value, left_child, right_child):
+        # Ключ пишется первым: если он не влезает в 64 бита, ничего ещё не изменено
+        try:
+            if self.__free:
+                node = self.__free[-1]
+                self.__keys[node] = key
+                self.__free.pop()
+                self.__values[node] = value
+                self.__left[node] = left_child
+                self.__right[node] = right_child
+            else:
+                node = len(self.__values)
+                self.__keys.append(key)
+                self.__values.append(value)
+                self.__left.append(left_child)
+                self.__right.append(right_child)
+        except OverflowError:
+            raise SplayTreeError("Key does not fit in 64 bits")
+        return node
+
+    def __free_node(self, node):
+        self.__values[node] = None
+        self.__free.append(node)
+
+    def __splay(self, key, node):
+        # Возвращает новый корень: вершину с ключом key или последнюю на пути к нему. Вместо
+        # вершины-заголовка левое и правое дерево собираются по номерам корня и крайней вершины
+        keys, left, right = self.__keys, self.__left, self.__right
+        left_root = right_root = left_max = right_min = -1
+        node_key = keys[node]
+        while True:
+            if key < node_key:
+                child = left[node]
+                if child == -1:
+                    break
+                child_key = keys[child]
+                if key < child_key:
+                    # Zig-Zig: поворот направо
+                    left[node] = right[child]
+                    right[child] = node
+                    node, node_key = child, child_key
+                    child = left[node]
+                    if child == -1:
+                        break
+                    child_key = keys[child]
+                # Вершина уходит в правое дерево
+                if right_min == -1:
+                    right_root = node
+                else:
+                    left[right_min] = node
+                right_min = node
+                node, node_key = child, child_key
+            elif key > node_key:
+                child = right[node]
+                if child == -1:
+                    break
+                child_key = keys[child]
+                if key > child_key:
+                    right[node] = left[child]
+                    left[child] = node
+                    node, node_key = child, child_key
+                    child = right[node]
+                    if child == -1:
+                        break
+                    child_key = keys[child]
+                # Вершина уходит в левое дерево
+                if left_max == -1:
+                    left_root = node
+                else:
+                    right[left_max] = node
+                left_max = node
+                node, node_key = child, child_key
+            else:
+                break
+        if left_max != -1:
+            right[left_max] = left[node]
+            left[node] = left_root
+        if right_min != -1:
+            left[right_min] = right[node]
+            right[node] = right_root
+        return node
+
+    def add(self, key, value):
+        if self.__root == -1:
+            self.__root = self.__new_node(key, value, self.NIL, self.NIL)
+            return
+        root = self.__root = self.__splay(key, self.__root)
+        root_key = self.__keys[root]
+        if key == root_key:
+            raise SplayTreeError("Element with this key already exists")
+        if key < root_key:
+            node = self.__new_node(key, value, self.__left[root], root)
+            self.__left[root] = self.NIL
+        else:
+            node = self.__new_node(key, value, root, self.__right[root])
+            self.__right[root] = self.NIL
+        self.__root = node
+
+    def delete(self, key):
+        if self.__root == -1:
+            raise SplayTreeError("Element with this key was not found")
+        root = self.__root = self.__splay(key, self.__root)
+        if key != self.__keys[root]:
+            raise SplayTreeError("Element with this key was not found")
+        if self.__left[root] == -1:
+            self.__root = self.__right[root]
+        else:
+            # key больше всех ключей слева, так что наверх поднимется максимум левого поддерева
+            self.__root = self.__splay(key, self.__left[root])
+            self.__right[self.__root] = self.__right[root]
+        self.__free_node(root)
+
+    def __search(self, key):
+        if self.__root == -1:
+            return self.NIL
+        root = self.__root = self.__splay(key, self.__root)
+        return root if self.__keys[root] == key else self.NIL
+
+    def search(self, key):
+        node = self.__search(key)
+        if node != -1:
+            return SplayItem(self.__keys[node], self.__values[node])
+        return None
+
+    def set(self, key, value):
+        node = self.__search(key)
+        if node != -1:
+            self.__values[node] = value
+        else:
+            raise SplayTreeError("Element with this key was not found")
+
+    def min(self):
+        if self.__root != -1:
+            node = self.__root = self.__splay(float('-inf'), self.__root)
+            return SplayItem(self.__keys[node], self.__values[node])
+        raise SplayTreeError("Splay tree is empty")
+
+    def max(self):
+        if self.__root != -1:
+            node = self.__root = self.__splay(float('inf'), self.__root)
+            return SplayItem(self.__keys[node], self.__values[node])
+        raise SplayTreeError("Splay tree is empty")
+
+    def print_tree(self, output_stream=sys.stdout):
+        if self.__root == -1:
+            print("_", file=output_stream)
+            return
+
+        keys, values = self.__keys, self.__values
+        left, right = self.__left, self.__right
+        root = self.__root
+        writer = LevelWriter(output_stream)
+        writer.write(f"[{keys[root]} {values[root]}]\n")
+
+        # Родителей нет, поэтому ключ родителя едет в уровне вместе с вершиной
+        level = []
+        if left[root] != -1:
+            level.append((0, left[root], keys[root]))
+        if right[root] != -1:
+            level.append((1, right[root], keys[root]))
+        level_length = 2
+
+        while True:
+            previous = -1
+            next_level = []
+            for index, node, parent_key in level:
+                writer.write_gaps(index - previous - 1)
+                node_key = keys[node]
+                writer.write_token(f"[{node_key} {values[node]} {parent_key}]")
+                if left[node] != -1:
+                    next_level.append((2 * index, left[node], node_key))
+                if right[node] != -1:
+                    next_level.append((2 * index + 1, right[node], node_key))
+                previous = index
+            writer.write_gaps(level_length - previous - 1)
+            writer.end_line()
+
+            if not next_level:
+                break
+            level = next_level
+            level_length *= 2
+
+        writer.flush()
+
+
+class TopDownNode:
+    __slots__ = ('key', 'value', 'left', 'right')
+
+    def __init__(self, key, value):
+        self.key = key
+        self.value = value
+        self.left = None
+        self.right = None
+
+
+class TopDownSplayTree:
+    # Однопроходный splay сверху вниз (Sleator-Tarjan): спуск по ключу сразу собирает левое и правое
+    # дерево, родителей хранить не нужно, и подниматься обратно не приходится. Форма дерева получается
+    # другой, чем у SplayTree, поэтому print у этого движка печатает его собственное дерево
+    # (--engine topdown), а не то, что ожидается в задаче.
+    # rotations - повороты zig-zig, links - переносы вершины в левое или правое дерево. Каждый шаг
+    # спускается на уровень, так что rotations + links - это глубина найденной вершины, ровно столько же
+    # поворотов сделал бы SplayTree. Сравнивать с поворотами SplayTree надо именно сумму
+    def __init__(self):
+        self.__root = None
+        self.__header = TopDownNode(None, None)
+        self.rotations = 0
+        self.links = 0
+
+    def __splay(self, key, node):
+        # Возвращает новый корень: вершину с ключом key или последнюю на пути к нему
+        header = self.__header
+        header.left = header.right = None
+        left_max = right_min = header
+        rotations = links = 0
+        while True:
+            if key < node.key:
+                if node.left is None:
+                    break
+                if key < node.left.key:
+                    # Zig-Zig: поворот направо
+                    child = node.left
+                    node.left = child.right
+                    child.right = node
+                    node = child
+                    rotations += 1
+                    if node.left is None:
+                        break
+                # Вершина уходит в правое дерево
+                right_min.left = node
+                right_min = node
+                node = node.left
+                links += 1
+            elif key > node.key:
+                if node.right is None:
+                    break
+                if key > node.right.key:
+                    child = node.right
+                    node.right = child.left
+                    child.left = node
+                    node = child
+                    rotations += 1
+                    if node.right is None:
+                        break
+                left_max.right = node
+                left_max = node
+                node = node.right
+                links += 1
+            else:
+                break
+        left_max.right = node.left
+        right_min.left = node.right
+        node.left = header.right
+        node.right = header.left
+        self.rotations += rotations
+        self.links += links
+        return node
+
+    def add(self, key, value):
+        if self.__root is None:
+            self.__root = TopDownNode(key, value)
+            return
+        root = self.__root = self.__splay(key, self.__root)
+        if key == root.key:
+            raise SplayTreeError("Element with this key already exists")
+        node = TopDownNode(key, value)
+        if key < root.key:
+            node.left = root.left
+            node.right = root
+            root.left = None
+        else:
+            node.right = root.right
+            node.left = root
+            root.right = None
+        self.__root = node
+
+    def delete(self, key):
+        if self.__root is None:
+            raise SplayTreeError("Element with this key was not found")
+        root = self.__root = self.__splay(key, self.__root)
+        if key != root.key:
+            raise SplayTreeError("Element with this key was not found")
+        if root.left is None:
+            self.__root = root.right
+        else:
+            # key больше всех ключей слева, так что наверх поднимется максимум левого поддерева
+            self.__root = self.__splay(key, root.left)
+            self.__root.right = root.right
+
+    def search(self, key):
+        if self.__root is None:
+            return None
+        self.__root = self.__splay(key, self.__root)
+        if self.__root.key == key:
+            return self.__root
+        return None
+
+    def set(self, key, value):
+        node = self.search(key)
+        if node:
+            node.value = value
+        else:
+            raise SplayTreeError("Element with this key was not found")
+
+    def min(self):
+        if self.__root:
+            self.__root = self.__splay(float('-inf'), self.__root)
+            return self.__root
+        raise SplayTreeError("Splay tree is empty")
+
+    def max(self):
+        if self.__root:
+            self.__root = self.__splay(float('inf'), self.__root)
+            return self.__root
+        raise SplayTreeError("Splay tree is empty")
+
+    def print_tree(self, output_stream=sys.stdout):
+        if not self.__root:
+            print("_", file=output_stream)
+            return
+
+        root = self.__root
+        writer = LevelWriter(output_stream)
+        writer.write(f"[{root.key} {root.value}]\n")
+
+        # Родителей в вершинах нет, поэтому ключ родителя едет в уровне вместе с вершиной
+        level = []
+        if root.left:
+            level.append((0, root.left, root.key))
+        if root.right:
+            level.append((1, root.right, root.key))
+        level_length = 2
+
+        while True:
+            previous = -1
+            next_level = []
+            for index, node, parent_key in level:
+                writer.write_gaps(index - previous - 1)
+                writer.write_token(f"[{node.key} {node.value} {parent_key}]")
+                if node.left:
+                    next_level.append((2 * index, node.left, node.key))
+                if node.right:
+                    next_level.append((2 * index + 1, node.right, node.key))
+                previous = index
+            writer.write_gaps(level_length - previous - 1)
+            writer.end_line()
+
+            if not next_level:
+                break
+            level = next_level
+            level_length *= 2
+
+        writer.flush()
+
+
+class ConcurrentSplayTree:
+    # Обёртка для общего дерева между потоками. Даже чтение (search/min/max) сплеит дерево,
+    # поэтому все операции проходят под одним замком. Наружу отдаются SplayItem, а не вершины:
+    # значение вершины может поменять другой поток
+    def __init__(self, tree=None):
+        self.__tree = tree if tree is not None else SplayTree()
+        self.__lock = threading.Lock()
+
+    @staticmethod
+    def __item(node):
+        return SplayItem(node.key, node.value) if node else None
+
+    def add(self, key, value):
+        with self.__lock:
+            self.__tree.add(key, value)
+
+    def set(self, key, value):
+        with self.__lock:
+            self.__tree.set(key, value)
+
+    def delete(self, key):
+        with self.__lock:
+            self.__tree.delete(key)
+
+    def search(self, key):
+        with self.__lock:
+            return self.__item(self.__tree.search(key))
+
+    def search_many(self, keys):
+        # Вся пачка за один захват замка. Ключи идут по возрастанию: после сплея предыдущего
+        # следующий лежит рядом с корнем, и его сплей короткий. Ответы - в порядке keys
+        found = {}
+        with self.__lock:
+            for key in sorted(set(keys)):
+                found[key] = self.__item(self.__tree.search(key))
+        return [found[key] for key in keys]
+
+    def peek(self, key):
+        # Без сплея: под замком проходит только спуск, без поворотов
+        with self.__lock:
+            return self.__item(self.__tree.peek(key))
+
+    def min(self):
+        with self.__lock:
+            return self.__item(self.__tree.min())
+
+    def max(self):
+        with self.__lock:
+            return self.__item(self.__tree.max())
+
+    def print_tree(self, output_stream=sys.stdout):
+        with self.__lock:
+            self.__tree.print_tree(output_stream=output_stream)
+
+
+class LevelWriter:
+    # Буфер для печати уровней: куски копятся в списке и пишутся в поток одним write,
+    # серии пустых мест берутся срезами заранее построенной строки "_ _ _ ..."
+    GAP_BLOCK = 1 << 12
+    GAPS = "_ " * GAP_BLOCK
+
+    def __init__(self, output_stream, buffer_size=1 << 16):
+        self.output_stream = output_stream
+        self.buffer_size = buffer_size
+        self.parts = []
+        self.size = 0
+        self.line_started = False
+
+    def write(self, text):
+        self.parts.append(text)
+        self.size += len(text)
+        if self.size >= self.buffer_size:
+            self.flush()
+
+    def write_token(self, token):
+        if self.line_started:
+            self.write(" ")
+        self.write(token)
+        self.line_started = True
+
+    def write_gaps(self, count):
+        if count <= 0:
+            return
+        if self.line_started:
+            self.write(" ")
+        while count > self.GAP_BLOCK:
+            self.write(self.GAPS)
+            count -= self.GAP_BLOCK
+        self.write(self.GAPS[:2 * count - 1])
+        self.line_started = True
+
+    def end_line(self):
+        self.write("\n")
+        self.line_started = False
+
+    def flush(self):
+        if self.parts:
+            self.output_stream.write("".join(self.parts))
+            self.parts = []
+            self.size = 0
+
+
+ENGINES = {
+    'pointer': SplayTree,
+    'pool': PooledSplayTree,
+    'topdown': TopDownSplayTree,
+}
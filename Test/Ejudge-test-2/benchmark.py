@@ -0,0 +1,61 @@
+import io
+import random
+import sys
+import time
+
+from main import sum_lines, sum_stream
+
+
+def generate_data(size_mb, seed=0):
+    rng = random.Random(seed)
+    words = ['error', 'warn', 'id=', 'x-', '--', 'a1b2', 'temp:', '[', ']', '-', '']
+    lines = []
+    size = 0
+    while size < size_mb * (1 << 20):
+        parts = []
+        for _ in range(rng.randint(1, 12)):
+            if rng.random() < 0.6:
+                parts.append(str(rng.randint(-10 ** 9, 10 ** 9)))
+            else:
+                parts.append(rng.choice(words))
+        line = ' '.join(parts) + '\n'
+        lines.append(line)
+        size += len(line)
+    return ''.join(lines).encode()
+
+
+def run_lines(data):
+    stdin = sys.stdin
+    sys.stdin = io.TextIOWrapper(io.BytesIO(data), encoding='utf-8')
+    try:
+        return sum_lines()
+    finally:
+        sys.stdin = stdin
+
+
+def run_stream(data):
+    return sum_stream(io.BytesIO(data))
+
+
+def measure(name, func, data):
+    start = time.perf_counter()
+    result = func(data)
+    elapsed = time.perf_counter() - start
+    print(f"{name:>8}: {len(data) / (1 << 20) / elapsed:8.1f} MB/s ({elapsed:.3f} s) result={result}")
+    return result
+
+
+def main():
+    size_mb = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    data = generate_data(size_mb)
+    print(f"input: {len(data) / (1 << 20):.1f} MB")
+
+    lines_result = measure("lines", run_lines, data)
+    stream_result = measure("stream", run_stream, data)
+    if lines_result != stream_result:
+        print("results differ!")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
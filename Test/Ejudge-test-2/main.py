@@ -1,20 +1,87 @@
 import re
+import sys
 
-result = 0
+CHUNK_SIZE = 1 << 20
+
+# Цифры и минус остаются как есть, байты >= 128 тоже (нужны для отката на regex),
+# всё остальное ASCII превращается в пробел
+_NUMBER_BYTES = b'-0123456789'
+_TRANSLATION = bytes(b if b >= 128 or b in _NUMBER_BYTES else ord(' ') for b in range(256))
 
-while True:
-    try:
-        input_string = input()
-        numbers = re.findall(r'-?\d+', input_string)
 
+def sum_numbers(numbers):
+    try:
+        return sum(map(int, numbers))
+    except ValueError:
+        # Слишком длинные числа int() не разбирает - пропускаем их по одному, как раньше
+        result = 0
         for number in numbers:
             try:
-                int_number = int(number)
-                result += int_number
+                result += int(number)
             except ValueError:
                 pass
+        return result
+
+
+def sum_lines():
+    result = 0
+
+    while True:
+        try:
+            input_string = input()
+            numbers = re.findall(r'-?\d+', input_string)
+
+            for number in numbers:
+                try:
+                    int_number = int(number)
+                    result += int_number
+                except ValueError:
+                    pass
+
+        except EOFError:
+            break
+
+    return result
+
+
+def sum_segment(segment, encoding='utf-8'):
+    if not segment.isascii():
+        # Юникодные цифры ловит только \d, поэтому такой кусок считаем старым способом
+        return sum_numbers(re.findall(r'-?\d+', segment.decode(encoding)))
+    # Каждый минус начинает новое число, одиночные минусы выкидываем
+    return sum_numbers(segment.replace(b'-', b' -').replace(b'- ', b' ').split())
+
+
+def sum_stream(input_stream=None, chunk_size=CHUNK_SIZE):
+    if input_stream is None:
+        input_stream = sys.stdin.buffer
+
+    result = 0
+    tail = b''
+
+    while True:
+        chunk = input_stream.read(chunk_size)
+        if not chunk:
+            break
+
+        data = chunk.translate(_TRANSLATION)
+        if tail:
+            data = tail + data
+
+        # Режем по последнему разделителю, хвост может быть началом числа из следующего куска
+        cut = data.rfind(b' ') + 1
+        result += sum_segment(data[:cut])
+        tail = data[cut:]
+
+    return result + sum_segment(tail + b' ')
+
+
+def main():
+    if '--stream' in sys.argv[1:]:
+        print(sum_stream())
+    else:
+        print(sum_lines())
 
-    except EOFError:
-        break
 
-print(result)
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+import os
+import random
+import sys
+import tempfile
+import time
+
+from main import sum_file, sum_file_parallel
+
+
+def generate_file(path, size_mb, seed=0):
+    rng = random.Random(seed)
+    size = 0
+    with open(path, 'w') as output_file:
+        while size < size_mb * (1 << 20):
+            lines = [str(rng.randint(-10 ** 6, 10 ** 6)) for _ in range(10000)]
+            if rng.random() < 0.1:
+                lines.append('not a number')
+            block = '\n'.join(lines) + '\n'
+            output_file.write(block)
+            size += len(block)
+
+
+def measure(name, func, *args):
+    start = time.perf_counter()
+    result = func(*args) % 256
+    elapsed = time.perf_counter() - start
+    print(f"{name:>12}: {elapsed:7.3f} s result={result}")
+    return result, elapsed
+
+
+def main():
+    size_mb = int(sys.argv[1]) if len(sys.argv) > 1 else 256
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'input.txt')
+        generate_file(path, size_mb)
+        print(f"input: {os.path.getsize(path) / (1 << 20):.1f} MB, cpus: {os.cpu_count()}")
+
+        expected, base = measure("lines", sum_file, path)
+
+        workers = 1
+        while workers <= (os.cpu_count() or 1):
+            result, elapsed = measure(f"mmap x{workers}", sum_file_parallel, path, workers)
+            print(f"{'':>12}  speedup {base / elapsed:.2f}x")
+            if result != expected:
+                print("results differ!")
+                sys.exit(1)
+            workers *= 2
+
+
+if __name__ == '__main__':
+    main()
@@ -1,17 +1,125 @@
-import sys
+import argparse
+import mmap
+import os
+from concurrent.futures import ProcessPoolExecutor
 
-input_file_name = sys.argv[1]
-output_file_name = sys.argv[2]
+BLOCK_SIZE = 16 << 20
+BATCH_SIZE = 4096
 
-result = 0
 
-with open(input_file_name, 'r') as input_file:
-    for line in input_file:
+def sum_lines(lines):
+    result = 0
+    for line in lines:
         try:
-            num = int(line)
-            result += num
+            result += int(line)
         except ValueError:
             pass
+    return result
 
-with open(output_file_name, 'w') as output_file:
-    output_file.write(str(result % 256))
+
+def sum_file(input_file_name):
+    result = 0
+
+    with open(input_file_name, 'r') as input_file:
+        for line in input_file:
+            try:
+                num = int(line)
+                result += num
+            except ValueError:
+                pass
+
+    return result
+
+
+def find_line_start(data, position):
+    # Первая позиция после '\n', не раньше position
+    if position <= 0:
+        return 0
+    newline = data.find(b'\n', position - 1)
+    return len(data) if newline == -1 else newline + 1
+
+
+def split_ranges(data, parts):
+    size = len(data)
+    bounds = [find_line_start(data, size * i // parts) for i in range(parts)] + [size]
+    return [(start, end) for start, end in zip(bounds, bounds[1:]) if start < end]
+
+
+def split_lines(block, carriage_return, newline):
+    # Универсальные переводы строк, как при чтении в текстовом режиме
+    lines = block.replace(carriage_return + newline, newline).replace(carriage_return, newline).split(newline)
+    if not lines[-1]:
+        # Хвост после последнего '\n' - не строка
+        lines.pop()
+    return lines
+
+
+def sum_block(block):
+    if not block.isascii():
+        # Юникодные цифры int() понимает только в строках
+        return sum_lines(split_lines(block.decode(), '\r', '\n'))
+
+    lines = split_lines(block, b'\r', b'\n')
+    result = 0
+    for i in range(0, len(lines), BATCH_SIZE):
+        batch = lines[i:i + BATCH_SIZE]
+        try:
+            result += sum(map(int, batch))
+        except ValueError:
+            # Нечисловые строки пропускаем по одной, int() от строки понимает пробелы,
+            # которых не знает int() от bytes
+            result += sum_lines(line.decode() for line in batch)
+    return result
+
+
+def sum_range(input_file_name, start, end):
+    result = 0
+
+    with open(input_file_name, 'rb') as input_file:
+        with mmap.mmap(input_file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            # Внутри диапазона читаем блоками по границам строк, чтобы не держать всё в памяти
+            while start < end:
+                block_end = min(find_line_start(data, start + BLOCK_SIZE), end)
+                result += sum_block(data[start:block_end])
+                start = block_end
+
+    return result
+
+
+def sum_file_parallel(input_file_name, workers=None):
+    workers = workers or os.cpu_count() or 1
+
+    if os.path.getsize(input_file_name) == 0:
+        return 0
+
+    with open(input_file_name, 'rb') as input_file:
+        with mmap.mmap(input_file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            ranges = split_ranges(data, workers)
+
+    if len(ranges) == 1:
+        return sum_range(input_file_name, *ranges[0])
+
+    with ProcessPoolExecutor(max_workers=len(ranges)) as executor:
+        futures = [executor.submit(sum_range, input_file_name, start, end) for start, end in ranges]
+        return sum(future.result() for future in futures)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('input_file_name')
+    parser.add_argument('output_file_name')
+    parser.add_argument('--mmap', action='store_true', help='sum newline-aligned ranges in worker processes')
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    if args.mmap:
+        result = sum_file_parallel(args.input_file_name, args.workers)
+    else:
+        result = sum_file(args.input_file_name)
+
+    with open(args.output_file_name, 'w') as output_file:
+        output_file.write(str(result % 256))
+
+
+if __name__ == '__main__':
+    main()